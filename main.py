@@ -1,39 +1,83 @@
 import sys
 import os
+import copy
 import json
-import socket
+import time
+import random
+import argparse
+import tempfile
+import shutil
+import tracemalloc
+import cProfile
+import pstats
+import io
+import functools
+import traceback
+import logging
+import logging.handlers
+import mmap
+import multiprocessing
+import getpass
+import struct
+import bisect
+import heapq
+import subprocess
+import threading
+import signal
+import urllib.error
+import urllib.request
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from PyQt6.QtWidgets import (
     QApplication, QSystemTrayIcon, QMenu, QDialog, QVBoxLayout, QHBoxLayout,
     QLabel, QTimeEdit, QPushButton, QMessageBox, QCheckBox, QMainWindow,
-    QWidget, QListWidget, QListWidgetItem, QTextEdit, QGroupBox, QComboBox
+    QWidget, QListWidget, QListWidgetItem, QTextEdit, QGroupBox, QComboBox, QLineEdit,
+    QTableWidget, QTableWidgetItem, QDateEdit, QHeaderView, QAbstractItemView, QInputDialog,
+    QSpinBox, QListView, QTabWidget
+)
+from PyQt6.QtCore import (
+    QTimer, QTime, QDate, QSettings, Qt, QObject, pyqtSignal,
+    QAbstractListModel, QSortFilterProxyModel, QModelIndex, QLockFile
 )
-from PyQt6.QtCore import QTimer, QTime, QSettings, Qt, QSocketNotifier
 from PyQt6.QtGui import QIcon, QAction, QFont, QPalette, QColor
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
 import datetime
-import winreg
-
-# 定义一个特定的端口用于单实例检查
-SINGLE_INSTANCE_PORT = 54321
-
-def is_instance_running():
+try:
+    import winreg
+except ImportError:
+    # 非 Windows 平台没有注册表，相关功能会走各自的异常分支
+    winreg = None
+try:
+    import numpy as np
+except ImportError:
+    # 没有 NumPy 时到期判断使用逐个任务比较
+    np = None
+
+# 单实例检查使用按用户区分的本地端点（Windows 上为命名管道，其他平台为 Unix 套接字）
+# 连接和等待确认的超时（毫秒）
+SINGLE_INSTANCE_TIMEOUT_MS = 1000
+
+def single_instance_name():
     try:
-        # 尝试创建一个监听套接字
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.bind(('127.0.0.1', SINGLE_INSTANCE_PORT))
-        sock.listen(1)
-        return False, sock
-    except OSError:
-        return True, None
-
-def activate_existing_instance():
-    try:
-        # 尝试连接到已运行的实例
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect(('127.0.0.1', SINGLE_INSTANCE_PORT))
-        sock.send(b'ACTIVATE')
-        sock.close()
+        user = getpass.getuser()
     except Exception:
-        pass
+        user = "user"
+    return "".join(c if c.isalnum() else "_" for c in f"{APP_NAME}-{user}")
+
+def activate_existing_instance(command="ACTIVATE", timeout_ms=SINGLE_INSTANCE_TIMEOUT_MS):
+    """ 把命令交给已运行的实例，收到确认时返回 True，没有实例或对方未确认时返回 False """
+    connection = QLocalSocket()
+    connection.connectToServer(single_instance_name())
+    if not connection.waitForConnected(timeout_ms):
+        return False
+    connection.write(f"{command}\n".encode('utf-8'))
+    connection.waitForBytesWritten(timeout_ms)
+    while not connection.canReadLine():
+        if not connection.waitForReadyRead(timeout_ms):
+            break
+    acknowledged = connection.canReadLine() and bytes(connection.readLine()).strip() == b"OK"
+    connection.abort()
+    return acknowledged
 
 # 检测Windows系统是否处于暗黑模式
 def is_windows_dark_mode():
@@ -83,84 +127,2401 @@ def resource_path(relative_path):
 ICON_PATH = resource_path("assets/icon.ico")
 APP_NAME = "ScheduledTaskApp"
 DATA_FILE = resource_path("data/tasks_data.json")
+# 任务正文单独存放在 DATA_FILE 同级目录，按任务 id 索引
+CONTENT_FILE = os.path.join(os.path.dirname(DATA_FILE), "tasks_content.dat")
+
+# 多个任务清单：清单目录文件记录每个清单的分片文件和状态
+LISTS_FILE = os.path.join(os.path.dirname(DATA_FILE), "task_lists.json")
+LISTS_DIR = os.path.join(os.path.dirname(DATA_FILE), "lists")
+DEFAULT_LIST_NAME = "默认清单"
+# 清单目录每次预留的任务 id 数量，预留用完才重写清单目录
+ID_RESERVE_BLOCK = 1000
+
+def journal_file_for(data_file):
+    """ 字段级修改的追加日志，与数据文件同名 """
+    return os.path.splitext(data_file)[0] + ".journal"
+
+def content_file_for(data_file):
+    """ 非默认数据文件的正文存储放在同目录的同名 .content.dat 中 """
+    if os.path.abspath(data_file) == os.path.abspath(DATA_FILE):
+        return CONTENT_FILE
+    return os.path.splitext(data_file)[0] + ".content.dat"
+# 列表中预览文本的长度
+PREVIEW_LENGTH = 30
+# 最近显示过的正文缓存条数
+CONTENT_CACHE_SIZE = 64
+
+WEEKDAY_NAMES = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+# 搜索框输入后延迟多久再过滤（毫秒）
+SEARCH_DEBOUNCE_MS = 150
+# 候选集不超过该数量时读取正文做精确校验
+SEARCH_VERIFY_LIMIT = 5000
+# 空闲时每批建立索引的任务数
+SEARCH_INDEX_BATCH = 500
+# 索引未建完时，尚未建索引的任务不超过该数量才逐条读取正文比对
+SEARCH_SCAN_LIMIT = 20000
+# 修改日志超过该条数时整体重写数据文件并清空日志
+JOURNAL_COMPACT_THRESHOLD = 500
+# 可以通过 update_task 修改的字段
+EDITABLE_FIELDS = ('content', 'weekdays', 'time', 'enabled', 'action', 'priority', 'ack_deadline')
+
+# 任务优先级：高优先级的提醒先显示，可以抢占正在显示的低优先级弹窗，且不受消息频率限制
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+PRIORITY_NAMES = {PRIORITY_LOW: "低", PRIORITY_NORMAL: "普通", PRIORITY_HIGH: "高"}
+# 超过确认期限仍未确认的提醒提升到该优先级
+PRIORITY_OVERDUE = PRIORITY_HIGH + 1
+
+# 任务动作类型
+ACTION_NONE = "none"
+ACTION_COMMAND = "command"
+ACTION_WEBHOOK = "webhook"
+# 动作线程池并发上限、排队上限和默认超时（秒）
+ACTION_MAX_WORKERS = 4
+ACTION_MAX_PENDING = 32
+ACTION_DEFAULT_TIMEOUT = 30
+# 超时结束进程组后等待剩余输出的秒数
+ACTION_KILL_GRACE = 2
+
+# 触发历史按天分段存放，超过保留天数的分段整体删除
+HISTORY_DIR = os.path.join(os.path.dirname(DATA_FILE), "history")
+HISTORY_RETENTION_DAYS = 90
+HISTORY_PAGE_SIZE = 50
+
+# 触发历史的结果类型
+HISTORY_FIRED = 0         # 已提醒，尚未确认
+HISTORY_ACKNOWLEDGED = 1  # 用户已确认
+HISTORY_SNOOZED = 2       # 用户选择稍后提醒
+HISTORY_DISMISSED = 3     # 弹窗被关闭但未确认
+HISTORY_OUTCOME_NAMES = {
+    HISTORY_FIRED: "已提醒",
+    HISTORY_ACKNOWLEDGED: "已确认",
+    HISTORY_SNOOZED: "稍后提醒",
+    HISTORY_DISMISSED: "未确认",
+}
+
+# 托盘消息频率限制：窗口内超过预算时合并为一条汇总提醒
+MESSAGE_BUDGET_DEFAULT = 5
+MESSAGE_BUDGET_WINDOW = 60
+
+# 稍后提醒的预设分钟数，以及未确认时默认的重复提醒间隔
+SNOOZE_PRESETS = [5, 10, 30]
+SNOOZE_MAX_MINUTES = 24 * 60
+REMIND_INTERVAL_DEFAULT = 5
+
+# 主线程卡顿监控：心跳间隔、判定卡顿的阈值（毫秒）和诊断日志
+WATCHDOG_HEARTBEAT_MS = 100
+WATCHDOG_STALL_MS = 1000
+DIAGNOSTICS_LOG = os.path.join(os.path.dirname(DATA_FILE), "diagnostics.log")
+DIAGNOSTICS_LOG_MAX_BYTES = 1024 * 1024
+DIAGNOSTICS_LOG_BACKUPS = 3
+
+# 性能分析：默认采集时长（秒）、内存差异输出条数、结果文件目录
+PROFILE_DEFAULT_SECONDS = 60
+PROFILE_TOP_N = 30
+PROFILE_DIR = os.path.dirname(DATA_FILE)
+
+# 订阅同步：默认拉取间隔、请求超时、出错退避上限（秒），订阅任务写入的清单
+SYNC_INTERVAL_DEFAULT = 300
+SYNC_TIMEOUT = 10
+SYNC_MAX_BACKOFF = 3600
+SYNC_LIST_NAME = "团队提醒"
+
+# 任务数达到该值且安装了 NumPy 时，到期判断改用列式数据
+COLUMNAR_MIN_TASKS = 2000
+
+# 多进程分片求值：默认工作进程数为 0，即在界面进程内求值
+EVAL_WORKERS_DEFAULT = 0
+EVAL_MAX_WORKERS = 16
+# 界面线程等待工作进程返回结果的最长时间（秒），超时的分片视为失效
+EVAL_REPLY_TIMEOUT = 2.0
+# 工作进程失效后最多重启的次数，超过后改为在界面进程内求值
+EVAL_MAX_RESTARTS = 3
 
 # 定义主题类型
 THEME_SYSTEM = "system"
 THEME_LIGHT = "light"
 THEME_DARK = "dark"
 
+class SystemClock:
+    """ 调度器读取时间的唯一入口，默认使用系统时间 """
+    def now(self):
+        return datetime.datetime.now()
+
+class SimulatedClock:
+    """ 可手动推进的时钟，用于回放和测试 """
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance(self, delta):
+        self.current += delta
+
+    def set(self, value):
+        self.current = value
+
+def collect_due_tasks(tasks, current_datetime):
+    """ 返回在 current_datetime 这一分钟到期且今天尚未触发的任务，并记录触发日期 """
+    current_weekday = current_datetime.weekday()
+    current_time_str = current_datetime.strftime("%H:%M")
+    today_str = current_datetime.date().isoformat()
+    due = []
+    for task in tasks:
+        if (task['enabled'] and
+            current_weekday in task['weekdays'] and
+            task['time'] == current_time_str and
+            task.get('last_triggered') != today_str):
+            task['last_triggered'] = today_str
+            due.append(task)
+    return due
+
+def next_fire_time(task, now):
+    """ 任务在 now 所在分钟及之后的下一次触发时间，不会再触发时返回 None """
+    if not task['enabled'] or not task['weekdays']:
+        return None
+    hour, minute = map(int, task['time'].split(':'))
+    base = now.replace(second=0, microsecond=0)
+    # 往后看 8 天，覆盖“今天已触发、下次是下周同一天”的情况
+    for offset in range(8):
+        day = base.date() + datetime.timedelta(days=offset)
+        if day.weekday() not in task['weekdays']:
+            continue
+        candidate = datetime.datetime.combine(day, datetime.time(hour, minute))
+        if candidate < base or task.get('last_triggered') == day.isoformat():
+            continue
+        return candidate
+    return None
+
+def weekday_mask(weekdays):
+    mask = 0
+    for weekday in weekdays:
+        mask |= 1 << weekday
+    return mask
+
+def minute_of_day(time_str):
+    """ 一天中的分钟数；逐个比较时按 HH:MM 字符串相等判断，不是该格式的时间永远不会到期，记为 -1 """
+    try:
+        hour, minute = map(int, time_str.split(':'))
+    except (AttributeError, ValueError):
+        return -1
+    return hour * 60 + minute if f"{hour:02d}:{minute:02d}" == time_str and hour < 24 and minute < 60 else -1
+
+def day_number(date_str):
+    """ 上次触发日期的序数，未触发过为 -1
+
+    逐个比较时只和 YYYY-MM-DD 字符串比较相等，格式不对的旧值同样当作未触发过。
+    """
+    try:
+        date = datetime.date.fromisoformat(date_str)
+    except (TypeError, ValueError):
+        return -1
+    return date.toordinal() if date.isoformat() == date_str else -1
+
+class TaskColumns:
+    """ 到期判断用的列式任务数据（需要 NumPy）
+
+    各列与任务列表按行对齐：启用标志、星期位掩码、一天中的分钟数、上次触发日期序数。
+    任务增删改时原地更新对应的行，某一分钟或某个时间窗口的到期任务由一次掩码运算得出，
+    结果顺序与 collect_due_tasks 逐个任务比较时相同。
+    """
+    def __init__(self, tasks):
+        count = len(tasks)
+        self.size = 0
+        self.allocate(max(count, 16))
+        self.enabled[:count] = np.fromiter((t['enabled'] for t in tasks), dtype=bool, count=count)
+        self.weekdays[:count] = np.fromiter((weekday_mask(t['weekdays']) for t in tasks), dtype=np.uint8, count=count)
+        self.minutes[:count] = np.fromiter((minute_of_day(t['time']) for t in tasks), dtype=np.int16, count=count)
+        self.last_days[:count] = np.fromiter((day_number(t.get('last_triggered')) for t in tasks), dtype=np.int32, count=count)
+        self.size = count
+
+    def allocate(self, capacity):
+        """ 按容量分配各列，保留已有的行 """
+        columns = {'enabled': bool, 'weekdays': np.uint8, 'minutes': np.int16, 'last_days': np.int32}
+        for name, dtype in columns.items():
+            column = np.zeros(capacity, dtype=dtype)
+            if self.size:
+                column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def set_row(self, row, task):
+        self.enabled[row] = task['enabled']
+        self.weekdays[row] = weekday_mask(task['weekdays'])
+        self.minutes[row] = minute_of_day(task['time'])
+        self.last_days[row] = day_number(task.get('last_triggered'))
+
+    def append(self, task):
+        if self.size == self.capacity:
+            self.allocate(self.capacity * 2)
+        self.size += 1
+        self.set_row(self.size - 1, task)
+
+    def extend(self, tasks):
+        if self.size + len(tasks) > self.capacity:
+            self.allocate(max(self.capacity * 2, self.size + len(tasks)))
+        for task in tasks:
+            self.size += 1
+            self.set_row(self.size - 1, task)
+
+    def remove_rows(self, rows):
+        """ 删除若干行，其余行保持原有顺序，与任务列表的过滤结果对齐 """
+        keep = np.ones(self.size, dtype=bool)
+        keep[list(rows)] = False
+        remaining = int(keep.sum())
+        for column in (self.enabled, self.weekdays, self.minutes, self.last_days):
+            column[:remaining] = column[:self.size][keep]
+        self.size = remaining
+
+    def day_mask(self, day):
+        """ 某一天可以触发的行：已启用、星期匹配且当天尚未触发 """
+        size = self.size
+        return (self.enabled[:size]
+                & ((self.weekdays[:size] >> day.weekday()) & 1).astype(bool)
+                & (self.last_days[:size] != day.toordinal()))
+
+    def due_rows(self, current_datetime):
+        """ 在这一分钟到期的行号，并记录触发日期 """
+        minute = current_datetime.hour * 60 + current_datetime.minute
+        rows = np.flatnonzero(self.day_mask(current_datetime.date()) & (self.minutes[:self.size] == minute))
+        self.last_days[rows] = current_datetime.date().toordinal()
+        return rows
+
+    def due_in_window(self, start, end):
+        """ [start, end) 内逐分钟到期的 (时间, 行号)，每天只需一次掩码运算，并记录触发日期 """
+        one_minute = datetime.timedelta(minutes=1)
+        start = start.replace(second=0, microsecond=0)
+        day_start = datetime.datetime.combine(start.date(), datetime.time.min)
+        due = []
+        while day_start < end:
+            first = (max(start, day_start) - day_start) // one_minute
+            # 当天窗口结束的分钟数，向上取整
+            stop = -((day_start - min(end, day_start + datetime.timedelta(days=1))) // one_minute)
+            minutes = self.minutes[:self.size]
+            rows = np.flatnonzero(self.day_mask(day_start.date()) & (minutes >= first) & (minutes < stop))
+            rows = rows[np.argsort(minutes[rows], kind='stable')]
+            self.last_days[rows] = day_start.toordinal()
+            due.extend((day_start + datetime.timedelta(minutes=minute), row)
+                       for minute, row in zip(minutes[rows].tolist(), rows.tolist()))
+            day_start += datetime.timedelta(days=1)
+        return due
+
+def replay_schedule(tasks, start, end, log_path=None, step=datetime.timedelta(minutes=1), workers=0):
+    """ 用模拟时钟尽可能快地回放 [start, end) 内的调度，不修改传入的任务
+
+    只回放到期判断，即每个时刻哪些任务会触发；稍后提醒、频率限制与汇总、
+    确认期限和历史记录属于托盘程序的分发流程，不在回放范围内。
+    workers 大于 0 时按天把时间窗口交给多进程分片求值。
+    """
+    if workers > 0:
+        return replay_schedule_sharded(tasks, start, end, log_path, step, workers)
+    tasks = copy.deepcopy(tasks)
+    clock = SimulatedClock(start.replace(second=0, microsecond=0))
+    ticks = 0
+    firings = 0
+    log = open(log_path, 'w', encoding='utf-8') if log_path else None
+    started = time.perf_counter()
+    try:
+        while clock.now() < end:
+            current = clock.now()
+            for task in collect_due_tasks(tasks, current):
+                firings += 1
+                if log:
+                    log.write(f"{current:%Y-%m-%d %H:%M}\t{task['id']}\t{task['time']}\n")
+            ticks += 1
+            clock.advance(step)
+    finally:
+        if log:
+            log.close()
+    elapsed = time.perf_counter() - started
+    return {
+        'ticks': ticks,
+        'firings': firings,
+        'elapsed': elapsed,
+        'ticks_per_second': ticks / elapsed if elapsed else float('inf'),
+        'firings_per_second': firings / elapsed if elapsed else float('inf'),
+    }
+
+def evaluation_fields(task):
+    """ 求值只需要的字段，减少发给工作进程的数据量 """
+    return {
+        'id': task['id'],
+        'enabled': task['enabled'],
+        'weekdays': task['weekdays'],
+        'time': task['time'],
+        'last_triggered': task.get('last_triggered'),
+    }
+
+def evaluation_worker(conn):
+    """ 分片求值进程：持有一部分任务，按请求返回时间窗口内到期的任务
+
+    分片按序号保持加入顺序，逐分钟调用 collect_due_tasks，与单进程的求值逻辑完全相同。
+    """
+    shard = []
+    seqs = {}
+    rows = {}
+    while True:
+        try:
+            command, payload = conn.recv()
+        except EOFError:
+            # 界面进程放弃了这个工作进程
+            break
+        if command == 'stop':
+            break
+        if command == 'load':
+            shard = [task for _, task in payload]
+            seqs = {task['id']: seq for seq, task in payload}
+            rows = {task['id']: row for row, task in enumerate(shard)}
+        elif command == 'upsert':
+            for seq, task in payload:
+                row = rows.get(task['id'])
+                if row is None:
+                    # 新任务的序号总是最大的，追加后分片仍按序号有序
+                    rows[task['id']] = len(shard)
+                    shard.append(task)
+                else:
+                    shard[row] = task
+                seqs[task['id']] = seq
+        elif command == 'remove':
+            removed = set(payload)
+            shard = [task for task in shard if task['id'] not in removed]
+            rows = {task['id']: row for row, task in enumerate(shard)}
+            for task_id in removed:
+                seqs.pop(task_id, None)
+        elif command == 'window':
+            start, end, step = payload
+            due = []
+            current = start
+            while current < end:
+                for task in collect_due_tasks(shard, current):
+                    due.append((current, seqs[task['id']], task['id']))
+                current += step
+            conn.send(due)
+    conn.close()
+
+class EvaluatorError(Exception):
+    """ 求值进程已退出、管道断开或未在期限内返回结果 """
+
+class ShardedEvaluator:
+    """ 多进程分片求值：按任务 id 的哈希把任务分到各工作进程，每个进程只持有自己的分片
+
+    调用方负责在任务增删改时同步 upsert/remove。每个任务带一个全局序号，
+    合并结果按 (时间, 序号) 排序，与单进程按任务顺序逐分钟求值的结果一致。
+    任一工作进程通信失败后 broken 置为 True，之后的同步请求直接忽略，由调用方重建。
+    """
+    def __init__(self, workers):
+        # 界面进程中有多个线程，统一用 spawn 启动工作进程，避免 fork 带来的锁状态问题
+        context = multiprocessing.get_context('spawn')
+        self.connections = []
+        self.processes = []
+        for index in range(workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=evaluation_worker, args=(child_conn,),
+                                      name=f"task-eval-{index}", daemon=True)
+            process.start()
+            child_conn.close()
+            self.connections.append(parent_conn)
+            self.processes.append(process)
+        self.seqs = {}
+        self.next_seq = 0
+        self.broken = False
+
+    def shard_of(self, task_id):
+        # 整数 id 的哈希就是它本身；字符串 id 的哈希受 PYTHONHASHSEED 影响，
+        # 同一进程内分配稳定，但每次启动的分片划分可能不同
+        return hash(task_id) % len(self.connections)
+
+    def send(self, conn, message):
+        if self.broken:
+            return
+        try:
+            conn.send(message)
+        except (OSError, EOFError) as e:
+            self.broken = True
+            raise EvaluatorError(f"求值进程通信失败: {e}") from e
+
+    def partition(self, tasks):
+        parts = [[] for _ in self.connections]
+        for task in tasks:
+            seq = self.seqs.get(task['id'])
+            if seq is None:
+                seq = self.seqs[task['id']] = self.next_seq
+                self.next_seq += 1
+            parts[self.shard_of(task['id'])].append((seq, evaluation_fields(task)))
+        return parts
+
+    def load(self, tasks):
+        self.seqs = {}
+        self.next_seq = 0
+        for conn, part in zip(self.connections, self.partition(tasks)):
+            self.send(conn, ('load', part))
+
+    def upsert(self, tasks):
+        for conn, part in zip(self.connections, self.partition(tasks)):
+            if part:
+                self.send(conn, ('upsert', part))
+
+    def remove(self, task_ids):
+        parts = [[] for _ in self.connections]
+        for task_id in task_ids:
+            if self.seqs.pop(task_id, None) is not None:
+                parts[self.shard_of(task_id)].append(task_id)
+        for conn, part in zip(self.connections, parts):
+            if part:
+                self.send(conn, ('remove', part))
+
+    def due_in_window(self, start, end, step=datetime.timedelta(minutes=1), timeout=None):
+        """ 返回 [start, end) 内逐个时刻到期的 (时间, 任务 id)，各进程并行求值
+
+        timeout 为等待所有分片结果的总秒数，None 表示一直等待；
+        超时或通信失败时抛出 EvaluatorError，晚到的结果会打乱管道，所以之后不能再使用。
+        """
+        if self.broken:
+            raise EvaluatorError("求值进程已失效")
+        for conn in self.connections:
+            self.send(conn, ('window', (start, end, step)))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        due = []
+        for conn in self.connections:
+            try:
+                if deadline is not None and not conn.poll(max(deadline - time.monotonic(), 0)):
+                    self.broken = True
+                    raise EvaluatorError(f"求值进程 {timeout}s 内没有返回结果")
+                due.extend(conn.recv())
+            except (OSError, EOFError) as e:
+                self.broken = True
+                raise EvaluatorError(f"求值进程通信失败: {e}") from e
+        due.sort(key=lambda item: (item[0], item[1]))
+        return [(when, task_id) for when, _, task_id in due]
+
+    def close(self):
+        for conn in self.connections:
+            try:
+                if not self.broken:
+                    conn.send(('stop', None))
+                conn.close()
+            except OSError:
+                pass
+        for process in self.processes:
+            # 失效时工作进程可能还卡在求值中，不等待直接结束
+            if not self.broken:
+                process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+def replay_schedule_sharded(tasks, start, end, log_path, step, workers):
+    current = start.replace(second=0, microsecond=0)
+    times = {task['id']: task['time'] for task in tasks}
+    ticks = 0
+    firings = 0
+    log = open(log_path, 'w', encoding='utf-8') if log_path else None
+    started = time.perf_counter()
+    evaluator = ShardedEvaluator(workers)
+    try:
+        evaluator.load(tasks)
+        while current < end:
+            window_end = min(current + datetime.timedelta(days=1), end)
+            for when, task_id in evaluator.due_in_window(current, window_end, step):
+                firings += 1
+                if log:
+                    log.write(f"{when:%Y-%m-%d %H:%M}\t{task_id}\t{times[task_id]}\n")
+            # 与逐个时刻推进的回放保持相同的时刻计数
+            while current < window_end:
+                ticks += 1
+                current += step
+    finally:
+        evaluator.close()
+        if log:
+            log.close()
+    elapsed = time.perf_counter() - started
+    return {
+        'ticks': ticks,
+        'firings': firings,
+        'elapsed': elapsed,
+        'ticks_per_second': ticks / elapsed if elapsed else float('inf'),
+        'firings_per_second': firings / elapsed if elapsed else float('inf'),
+    }
+
+# 合成负载的预设分布
+WORKLOAD_PRESETS = {
+    # 大量任务集中在工作日 09:00 前后
+    "clustered": {
+        "count": 100000,
+        "time": {"distribution": "clustered", "center": "09:00", "spread": 3, "fraction": 0.9},
+        "weekdays": "workdays",
+        "content": {"distribution": "fixed", "size": 40},
+    },
+    # 时间和星期均匀分布
+    "uniform": {
+        "count": 100000,
+        "time": {"distribution": "uniform"},
+        "weekdays": "random",
+        "content": {"distribution": "fixed", "size": 40},
+    },
+    # 正文长度服从帕累托分布，少数任务带很长的清单
+    "heavy-tail": {
+        "count": 20000,
+        "time": {"distribution": "uniform"},
+        "weekdays": "random",
+        "content": {"distribution": "pareto", "min": 20, "alpha": 1.2, "max": 50000},
+    },
+}
+WORKLOAD_WORDS = ["提交周报", "检查邮件", "备份数据库", "站会", "喝水", "review", "deploy",
+                  "同步进度", "整理文档", "确认排期", "check", "打卡", "客户回访", "续费提醒"]
+
+def generate_workload(spec, seed=None):
+    """ 按分布描述生成 [(任务, 正文), ...]，相同 seed 结果相同
+
+    显式传入的 seed 优先，否则使用分布描述中的 seed，都没有时为 0。
+    """
+    rng = random.Random(seed if seed is not None else spec.get("seed", 0))
+    count = spec.get("count", 1000)
+    time_spec = spec.get("time", {"distribution": "uniform"})
+    content_spec = spec.get("content", {"distribution": "fixed", "size": 40})
+    weekday_mode = spec.get("weekdays", "random")
+    enabled_ratio = spec.get("enabled_ratio", 1.0)
+
+    if time_spec.get("distribution") == "clustered":
+        hour, minute = map(int, time_spec.get("center", "09:00").split(":"))
+        center = hour * 60 + minute
+
+    workload = []
+    for task_id in range(1, count + 1):
+        if time_spec.get("distribution") == "clustered" and rng.random() < time_spec.get("fraction", 1.0):
+            minute_of_day = int(round(rng.gauss(center, time_spec.get("spread", 0)))) % 1440
+        else:
+            minute_of_day = rng.randrange(1440)
+
+        if weekday_mode == "workdays":
+            weekdays = [0, 1, 2, 3, 4]
+        elif weekday_mode == "all":
+            weekdays = list(range(7))
+        else:
+            weekdays = sorted(rng.sample(range(7), rng.randint(1, 7)))
+
+        if content_spec.get("distribution") == "pareto":
+            size = int(content_spec.get("min", 20) * rng.paretovariate(content_spec.get("alpha", 1.5)))
+            size = min(size, content_spec.get("max", 50000))
+        else:
+            size = content_spec.get("size", 40)
+        words = []
+        length = 0
+        while length < size:
+            word = rng.choice(WORKLOAD_WORDS)
+            words.append(word)
+            length += len(word) + 1
+        content = f"#{task_id} " + " ".join(words)
+
+        task = {
+            'id': task_id,
+            'weekdays': weekdays,
+            'time': f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}",
+            'enabled': rng.random() < enabled_ratio,
+            'last_triggered': None,
+        }
+        workload.append((task, content))
+    return workload
+
+def write_workload(workload, output, data_format="split"):
+    """ 写出任务文件：inline 为正文内联的旧格式，split 为预览 + 正文存储 """
+    dir_name = os.path.dirname(output)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    tasks = []
+    if data_format == "inline":
+        for task, content in workload:
+            tasks.append(dict(task, content=content))
+    else:
+        content_path = content_file_for(output)
+        if os.path.exists(content_path):
+            os.remove(content_path)
+        store = ContentStore(content_path)
+        for task, content in workload:
+            store.put(task['id'], content)
+            tasks.append(dict(task, preview=make_preview(content)))
+        store.close()
+    # 旧文件留下的修改日志会在加载时被重放到新生成的任务上
+    journal_path = journal_file_for(output)
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'tasks': tasks}, f, ensure_ascii=False)
+
+def run_load_test(data_file, start, days, workers=0):
+    """ 加载任务文件并按生产路径驱动调度，统计每个时刻、保存和内存开销
+
+    调度和保存都在临时目录中的副本上进行，输入文件保持不变，相同参数可以重复运行。
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_file = os.path.join(work_dir, os.path.basename(data_file))
+        for source, target in ((data_file, work_file),
+                               (content_file_for(data_file), content_file_for(work_file)),
+                               (journal_file_for(data_file), journal_file_for(work_file))):
+            if os.path.exists(source):
+                shutil.copyfile(source, target)
+        return simulate_load(work_file, os.path.join(work_dir, "history"), start, days, workers)
+
+def simulate_load(data_file, history_dir, start, days, workers):
+    """ run_load_test 的调度循环，会写回 data_file """
+    # tracemalloc 会显著拖慢调度循环，只在加载阶段开启
+    tracemalloc.start()
+    load_started = time.perf_counter()
+    task_data = TaskData(data_file)
+    load_cost = time.perf_counter() - load_started
+    loaded_memory, load_peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    evaluator = None
+    if workers > 0:
+        evaluator = ShardedEvaluator(workers)
+        evaluator.load(task_data.tasks)
+    clock = SimulatedClock(start.replace(second=0, microsecond=0))
+    end = clock.now() + datetime.timedelta(days=days)
+    tick_costs = []
+    save_costs = []
+    firings = 0
+    history = HistoryStore(history_dir, clock=clock)
+    while clock.now() < end:
+        current = clock.now()
+        tick_started = time.perf_counter()
+        if evaluator is None:
+            due = task_data.collect_due(current)
+        else:
+            due = task_data.apply_due(evaluator.due_in_window(current, current + datetime.timedelta(minutes=1)), current)
+        for task in due:
+            history.record_firing(task['id'], current, current)
+        tick_costs.append(time.perf_counter() - tick_started)
+        if due:
+            firings += len(due)
+            save_started = time.perf_counter()
+            task_data.save_changes({task['id']: {'last_triggered': task['last_triggered']} for task in due})
+            save_costs.append(time.perf_counter() - save_started)
+        clock.advance(datetime.timedelta(minutes=1))
+    if evaluator is not None:
+        evaluator.close()
+    task_data.content_store.close()
+
+    tick_costs.sort()
+    return {
+        'tasks': len(task_data.tasks),
+        'ticks': len(tick_costs),
+        'firings': firings,
+        'load_cost': load_cost,
+        'tick_avg': sum(tick_costs) / len(tick_costs) if tick_costs else 0.0,
+        'tick_p99': tick_costs[int(len(tick_costs) * 0.99)] if tick_costs else 0.0,
+        'tick_max': tick_costs[-1] if tick_costs else 0.0,
+        'saves': len(save_costs),
+        'save_avg': sum(save_costs) / len(save_costs) if save_costs else 0.0,
+        'save_max': max(save_costs, default=0.0),
+        'loaded_memory': loaded_memory,
+        'load_peak_memory': load_peak_memory,
+        'max_rss': max_rss_bytes(),
+    }
+
+def run_due_benchmark(data_file, start, days):
+    """ 对比逐个任务比较、列式逐分钟和列式按天窗口三种到期判断，并检查结果一致，不写回任务文件 """
+    task_data = TaskData(data_file)
+    tasks = task_data.tasks
+    task_data.content_store.close()
+    start = start.replace(second=0, microsecond=0)
+    end = start + datetime.timedelta(days=days)
+    step = datetime.timedelta(minutes=1)
+
+    loop_tasks = copy.deepcopy(tasks)
+    loop_due = []
+    current = start
+    started = time.perf_counter()
+    while current < end:
+        loop_due.extend((current, task['id']) for task in collect_due_tasks(loop_tasks, current))
+        current += step
+    loop_cost = time.perf_counter() - started
+
+    build_started = time.perf_counter()
+    columns = TaskColumns(tasks)
+    build_cost = time.perf_counter() - build_started
+    ids = [task['id'] for task in tasks]
+    minute_due = []
+    current = start
+    started = time.perf_counter()
+    while current < end:
+        minute_due.extend((current, ids[row]) for row in columns.due_rows(current).tolist())
+        current += step
+    minute_cost = time.perf_counter() - started
+
+    columns = TaskColumns(tasks)
+    started = time.perf_counter()
+    window_due = [(when, ids[row]) for when, row in columns.due_in_window(start, end)]
+    window_cost = time.perf_counter() - started
+
+    ticks = (end - start) // step
+    return {
+        'tasks': len(tasks),
+        'ticks': ticks,
+        'firings': len(loop_due),
+        'loop_tick': loop_cost / ticks,
+        'column_build': build_cost,
+        'column_tick': minute_cost / ticks,
+        'window_cost': window_cost,
+        'identical': loop_due == minute_due == window_due,
+    }
+
+def max_rss_bytes():
+    """ 进程峰值常驻内存，平台不支持时返回 None """
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以 KB 为单位
+    return usage if sys.platform == "darwin" else usage * 1024
+
+def make_preview(content):
+    """ 生成列表中显示的预览文本 """
+    flat = " ".join(content.split())
+    return f"{flat[:PREVIEW_LENGTH]}{'...' if len(flat) > PREVIEW_LENGTH else ''}"
+
+class ContentStore:
+    """ 任务正文存储：追加写入的记录文件 + 内存映射读取 + LRU 缓存
+
+    记录格式为 <任务id:int32><长度:uint32><utf-8 正文>，同一 id 以最后一条记录为准，
+    长度为 TOMBSTONE 的记录表示该 id 已删除。
+    """
+    HEADER = struct.Struct('<iI')
+    TOMBSTONE = 0xFFFFFFFF
+
+    def __init__(self, path, cache_size=CONTENT_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self.index = {}  # id -> (正文偏移, 长度)
+        self.cache = OrderedDict()
+        self.garbage = 0  # 已失效记录占用的字节数
+        self._file = None
+        self._mmap = None
+        self._mapped_size = 0
+        self._open()
+
+    def _open(self):
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self._file = open(self.path, 'a+b')
+        self._scan()
+
+    def _remap(self):
+        """ 文件增长后重新建立映射 """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.flush()
+        size = os.fstat(self._file.fileno()).st_size
+        if size:
+            self._mmap = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        self._mapped_size = size
+
+    def _scan(self):
+        """ 只读取记录头重建索引，正文保持在磁盘上 """
+        self._remap()
+        self.index.clear()
+        self.garbage = 0
+        offset = 0
+        header_size = self.HEADER.size
+        while offset < self._mapped_size:
+            if offset + header_size > self._mapped_size:
+                print(f"正文文件在偏移 {offset} 处截断，丢弃后续内容")
+                self._truncate(offset)
+                break
+            task_id, length = self.HEADER.unpack_from(self._mmap, offset)
+            body_offset = offset + header_size
+            body_length = 0 if length == self.TOMBSTONE else length
+            if body_offset + body_length > self._mapped_size:
+                # 截掉不完整的记录，否则之后追加的正文都落在扫描不到的位置
+                print(f"正文文件在偏移 {offset} 处截断，丢弃后续内容")
+                self._truncate(offset)
+                break
+            old = self.index.pop(task_id, None)
+            if old is not None:
+                self.garbage += header_size + old[1]
+            if length == self.TOMBSTONE:
+                self.garbage += header_size
+            else:
+                self.index[task_id] = (body_offset, length)
+            offset = body_offset + body_length
+
+    def _truncate(self, size):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.truncate(size)
+        self._remap()
+
+    def _append(self, task_id, payload, length):
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(self.HEADER.pack(task_id, length))
+        self._file.write(payload)
+        self._file.flush()
+        return offset + self.HEADER.size
+
+    def __contains__(self, task_id):
+        return task_id in self.index
+
+    def get(self, task_id, default="", cache=True):
+        """ cache=False 用于批量扫描，避免把最近显示过的正文挤出缓存 """
+        if task_id in self.cache:
+            self.cache.move_to_end(task_id)
+            return self.cache[task_id]
+        entry = self.index.get(task_id)
+        if entry is None:
+            return default
+        offset, length = entry
+        if offset + length > self._mapped_size:
+            self._remap()
+        content = self._mmap[offset:offset + length].decode('utf-8')
+        if cache:
+            self.cache[task_id] = content
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return content
+
+    def put(self, task_id, content):
+        payload = content.encode('utf-8')
+        old = self.index.get(task_id)
+        if old is not None:
+            self.garbage += self.HEADER.size + old[1]
+        self.index[task_id] = (self._append(task_id, payload, len(payload)), len(payload))
+        self.cache.pop(task_id, None)
+
+    def put_many(self, items):
+        """ 批量写入 (任务id, 正文)，所有记录一次写入文件 """
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        chunks = []
+        for task_id, content in items:
+            payload = content.encode('utf-8')
+            old = self.index.get(task_id)
+            if old is not None:
+                self.garbage += self.HEADER.size + old[1]
+            chunks.append(self.HEADER.pack(task_id, len(payload)))
+            chunks.append(payload)
+            self.index[task_id] = (offset + self.HEADER.size, len(payload))
+            self.cache.pop(task_id, None)
+            offset += self.HEADER.size + len(payload)
+        self._file.write(b"".join(chunks))
+        self._file.flush()
+
+    def delete(self, task_id):
+        old = self.index.pop(task_id, None)
+        self.cache.pop(task_id, None)
+        if old is None:
+            return
+        self._append(task_id, b'', self.TOMBSTONE)
+        self.garbage += 2 * self.HEADER.size + old[1]
+
+    def compact(self, live_ids=None):
+        """ 重写文件，只保留仍然有效的正文 """
+        live_ids = set(self.index) if live_ids is None else set(live_ids)
+        bodies = [(task_id, self.get(task_id).encode('utf-8')) for task_id in self.index if task_id in live_ids]
+        self.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            for task_id, payload in bodies:
+                f.write(self.HEADER.pack(task_id, len(payload)))
+                f.write(payload)
+        os.replace(tmp_path, self.path)
+        self.cache.clear()
+        self._open()
+
+    def maybe_compact(self, live_ids=None):
+        if self.garbage > 64 * 1024 and self.garbage > self._mapped_size // 2:
+            self.compact(live_ids)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def normalize_search_text(text):
+    return " ".join(text.lower().split())
+
+def search_tokens(text):
+    """ 单字 + 相邻两字的 n-gram，不依赖分词即可检索中文 """
+    text = normalize_search_text(text)
+    tokens = set(text)
+    tokens.update(text[i:i + 2] for i in range(len(text) - 1))
+    tokens.discard(" ")
+    return tokens
+
+class SearchIndex:
+    """ 任务正文的倒排索引：n-gram -> 任务 id 集合，随增删改增量更新 """
+    def __init__(self, content_store):
+        self.content_store = content_store
+        self.postings = {}
+
+    def add(self, task_id, content):
+        for token in search_tokens(content):
+            self.postings.setdefault(token, set()).add(task_id)
+
+    def remove(self, task_id, content):
+        for token in search_tokens(content):
+            ids = self.postings.get(token)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self.postings[token]
+
+    def search(self, query):
+        """ 返回正文包含 query 的任务 id 集合 """
+        query = normalize_search_text(query)
+        if not query:
+            return None
+        if len(query) == 1:
+            return set(self.postings.get(query, ()))
+        grams = sorted({query[i:i + 2] for i in range(len(query) - 1)} - {" "},
+                       key=lambda g: len(self.postings.get(g, ())))
+        if not grams:
+            return set()
+        candidates = set(self.postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self.postings.get(gram, set())
+        # 多个 n-gram 同时出现不代表连续出现，候选不多时读取正文精确校验
+        if len(query) > 2 and len(candidates) <= SEARCH_VERIFY_LIMIT:
+            candidates = {task_id for task_id in candidates
+                          if query in normalize_search_text(self.content_store.get(task_id, cache=False))}
+        return candidates
+
 class TaskData:
-    def __init__(self):
+    def __init__(self, data_file=DATA_FILE, id_allocator=None):
         self.tasks = []
+        self.data_file = data_file
+        # 多个清单共用的 id 分配器，保证 id 跨清单唯一
+        self.id_allocator = id_allocator
+        # 列式到期判断数据，任务较多时首次求值才建立
+        self.columns = None
+        self.content_store = ContentStore(content_file_for(data_file))
+        self.search_index = None
+        self._index_pending = []
+        self.journal_file = journal_file_for(data_file)
+        self.journal_entries = 0
+        self.task_rows = {}  # 任务id -> 在 tasks 中的位置
+        self.max_id = 0      # 已分配过的最大任务 id，分配新 id 时不必遍历任务
         self.load_data()
 
     def load_data(self):
         try:
-            if os.path.exists(DATA_FILE):
-                with open(DATA_FILE, 'r', encoding='utf-8') as f:
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     self.tasks = data.get('tasks', [])
         except Exception as e:
             print(f"加载数据失败: {e}")
             self.tasks = []
+        self.rebuild_rows()
+        self.replay_journal()
+        self.max_id = max((t['id'] for t in self.tasks), default=0)
+
+        # 旧格式（正文内联在 json 中）迁移到正文存储
+        migrated = False
+        for task in self.tasks:
+            if 'content' in task:
+                content = task.pop('content')
+                self.content_store.put(task['id'], content)
+                task['preview'] = make_preview(content)
+                migrated = True
+            elif 'preview' not in task:
+                task['preview'] = make_preview(self.content_store.get(task['id']))
+        if migrated:
+            self.save_data()
 
     def save_data(self):
+        """ 整体重写数据文件，成功后清空修改日志 """
         try:
             data = {'tasks': self.tasks}
-            with open(DATA_FILE, 'w', encoding='utf-8') as f:
+            tmp_path = self.data_file + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.data_file)
+            if self.journal_entries or os.path.exists(self.journal_file):
+                open(self.journal_file, 'w').close()
+            self.journal_entries = 0
         except Exception as e:
             print(f"保存数据失败: {e}")
 
-    def add_task(self, content, weekdays, time_str):
+    def replay_journal(self):
+        """ 把上次整体保存之后的字段修改应用到已加载的任务上
+
+        写入中途退出时最后一行可能不完整，重放后把它截掉，之后的追加从新的一行开始。
+        """
+        if not os.path.exists(self.journal_file):
+            return
+        try:
+            with open(self.journal_file, 'rb') as f:
+                data = f.read()
+            good_end = 0
+            position = 0
+            for line in data.splitlines(keepends=True):
+                position += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                task = self.get_task(entry.get('id'))
+                if task is not None:
+                    task.update(entry.get('set', {}))
+                self.journal_entries += 1
+                good_end = position
+            if good_end < len(data) or (data and not data.endswith(b"\n")):
+                with open(self.journal_file, 'r+b') as f:
+                    f.truncate(good_end)
+                    if good_end and not data[:good_end].endswith(b"\n"):
+                        # 最后一条完整记录缺少换行
+                        f.seek(good_end)
+                        f.write(b"\n")
+        except Exception as e:
+            print(f"读取修改日志失败: {e}")
+
+    def save_changes(self, changes):
+        """ 只把变化的字段追加到修改日志，changes 为 {任务id: {字段: 新值}} """
+        if not changes:
+            return
+        if self.journal_entries + len(changes) > JOURNAL_COMPACT_THRESHOLD:
+            self.save_data()
+            return
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                for task_id, fields in changes.items():
+                    f.write(json.dumps({'id': task_id, 'set': fields}, ensure_ascii=False) + "\n")
+            self.journal_entries += len(changes)
+        except Exception as e:
+            print(f"保存修改失败: {e}")
+            self.save_data()
+
+    def rebuild_rows(self):
+        self.task_rows = {task['id']: row for row, task in enumerate(self.tasks)}
+
+    def get_task(self, task_id):
+        row = self.task_rows.get(task_id)
+        return None if row is None else self.tasks[row]
+
+    def update_task(self, task_id, **fields):
+        """ 原地修改任务，只持久化实际变化的字段，返回 {字段: 新值} """
+        task = self.get_task(task_id)
+        if task is None:
+            return {}
+        changed = self._apply_fields(task, fields)
+        if changed:
+            self.save_changes({task_id: self._persisted_fields(task, changed)})
+        return changed
+
+    def _apply_fields(self, task, fields, content_updates=None):
+        """ 修改任务字段并同步列式数据，返回 {字段: 新值}
+
+        传入 content_updates 时正文的变化 (任务id, 旧正文, 新正文) 收集到其中，由调用方批量写入。
+        """
+        task_id = task['id']
+        changed = {}
+        for field, value in fields.items():
+            if field not in EDITABLE_FIELDS:
+                raise ValueError(f"不支持修改的字段: {field}")
+            if field == 'content':
+                old_content = self.content_store.get(task_id, cache=False)
+                if value == old_content:
+                    continue
+                if content_updates is None:
+                    self._store_contents([(task_id, old_content, value)])
+                else:
+                    content_updates.append((task_id, old_content, value))
+                changed['content'] = value
+                task['preview'] = make_preview(value)
+            elif field == 'action':
+                if not value or value.get('type', ACTION_NONE) == ACTION_NONE:
+                    value = None
+                if task.get('action') != value:
+                    task['action'] = value
+                    changed['action'] = value
+            elif task.get(field) != value:
+                task[field] = value
+                changed[field] = value
+
+        # 时间或星期变化后，新的时间今天仍然可以触发
+        if ('time' in changed or 'weekdays' in changed) and task.get('last_triggered'):
+            task['last_triggered'] = None
+            changed['last_triggered'] = None
+
+        if changed:
+            self.sync_columns(task)
+        return changed
+
+    @staticmethod
+    def _persisted_fields(task, changed):
+        """ 需要写入数据文件的字段：正文已在正文存储中，数据文件只需记录新的预览 """
+        persisted = {k: v for k, v in changed.items() if k != 'content'}
+        if 'content' in changed:
+            persisted['preview'] = task['preview']
+        return persisted
+
+    def _store_contents(self, updates):
+        """ 一次写入若干条正文并更新搜索索引，updates 为 [(任务id, 旧正文或 None, 新正文)] """
+        self.content_store.put_many((task_id, content) for task_id, _, content in updates)
+        if self.search_index is not None:
+            for task_id, old_content, content in updates:
+                if old_content is not None:
+                    self.search_index.remove(task_id, old_content)
+                self.search_index.add(task_id, content)
+
+    def next_task_id(self, count=1):
+        """ 分配 count 个连续的任务 id，返回第一个 """
+        task_id = self.max_id + 1
+        if self.id_allocator is not None:
+            task_id = self.id_allocator(task_id, count)
+        self.max_id = task_id + count - 1
+        return task_id
+
+    def iter_tasks(self):
+        return iter(self.tasks)
+
+    def close(self):
+        self.content_store.close()
+
+    def get_content(self, task):
+        """ 按需读取任务正文，临时任务（如测试通知）直接携带 content """
+        if 'content' in task:
+            return task['content']
+        return self.content_store.get(task['id'])
+
+    def add_task(self, content, weekdays, time_str, action=None, priority=PRIORITY_NORMAL, ack_deadline=None, save=True):
+        task = self._new_task(self.next_task_id(), content, weekdays, time_str, action, priority, ack_deadline)
+        self._store_contents([(task['id'], None, content)])
+        self._append_tasks([task])
+        if save:
+            self.save_data()
+        return task
+
+    @staticmethod
+    def _new_task(task_id, content, weekdays, time_str, action, priority, ack_deadline):
         task = {
-            'id': len(self.tasks) + 1,
-            'content': content,
+            'id': task_id,
+            'preview': make_preview(content),
             'weekdays': weekdays,
             'time': time_str,
             'enabled': True,
+            'priority': priority,
+            'ack_deadline': ack_deadline,
             'last_triggered': None
         }
-        self.tasks.append(task)
-        self.save_data()
+        if action and action.get('type', ACTION_NONE) != ACTION_NONE:
+            task['action'] = action
         return task
 
+    def _append_tasks(self, tasks):
+        for row, task in enumerate(tasks, len(self.tasks)):
+            self.task_rows[task['id']] = row
+        self.tasks.extend(tasks)
+        if self.columns is not None:
+            self.columns.extend(tasks)
+
     def remove_task(self, task_id):
-        self.tasks = [t for t in self.tasks if t['id'] != task_id]
-        self.save_data()
+        self.remove_tasks([task_id])
+
+    def remove_tasks(self, task_ids, save=True):
+        removed = set(task_ids)
+        if self.columns is not None:
+            self.columns.remove_rows(self.task_rows[task_id] for task_id in removed if task_id in self.task_rows)
+        self.tasks = [t for t in self.tasks if t['id'] not in removed]
+        self.rebuild_rows()
+        for task_id in removed:
+            if self.search_index is not None:
+                self.search_index.remove(task_id, self.content_store.get(task_id, cache=False))
+            self.content_store.delete(task_id)
+        self.content_store.maybe_compact(t['id'] for t in self.tasks)
+        if save:
+            self.save_data()
+
+    def merge_feed(self, feed_tasks):
+        """ 按订阅源中的任务 id 合并：新增、修改，并删除订阅源中已不存在的任务
+
+        订阅任务在本地另行分配 id，订阅源中的 id 记在 feed_id 字段里。
+        返回 {'added': [...], 'updated': [...], 'removed': [...]}（本地任务 id）。
+        """
+        by_feed_id = {t['feed_id']: t for t in self.tasks if 'feed_id' in t}
+        new_items, changes, content_updates, seen = [], {}, [], set()
+        for item in feed_tasks:
+            seen.add(item['id'])
+            task = by_feed_id.get(item['id'])
+            if task is None:
+                new_items.append(item)
+                continue
+            changed = self._apply_fields(task, {field: item[field] for field in EDITABLE_FIELDS}, content_updates)
+            if changed:
+                changes[task['id']] = self._persisted_fields(task, changed)
+
+        # 新任务一次分配连续的 id，正文、索引和列式数据都批量更新
+        added = []
+        if new_items:
+            first_id = self.next_task_id(len(new_items))
+            for task_id, item in enumerate(new_items, first_id):
+                task = self._new_task(task_id, item['content'], item['weekdays'], item['time'], item['action'],
+                                      item['priority'], item['ack_deadline'])
+                task['feed_id'] = item['id']
+                task['enabled'] = item['enabled']
+                content_updates.append((task_id, None, item['content']))
+                added.append(task)
+            self._append_tasks(added)
+        if content_updates:
+            self._store_contents(content_updates)
+
+        removed = [t['id'] for t in by_feed_id.values() if t['feed_id'] not in seen]
+        if added or removed:
+            self.remove_tasks(removed, save=False)
+            self.save_data()
+        else:
+            self.save_changes(changes)
+        return {'added': [t['id'] for t in added], 'updated': list(changes), 'removed': removed}
+
+    def build_search_index_step(self, batch=SEARCH_INDEX_BATCH):
+        """ 分批建立搜索索引，返回是否已完成；建立期间的增删会直接更新索引 """
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.content_store)
+            self._index_pending = [t['id'] for t in self.tasks]
+        pending = self._index_pending
+        for _ in range(min(batch, len(pending))):
+            task_id = pending.pop()
+            # 建立期间被删除的任务已不在正文存储中
+            if task_id in self.content_store:
+                self.search_index.add(task_id, self.content_store.get(task_id, cache=False))
+        return not pending
+
+    def search(self, query):
+        """ 按正文搜索，返回 (匹配的任务 id 集合, 结果是否完整)
+
+        索引尚未建完时不等待：已建索引的部分查索引，其余任务不多时逐条读取正文比对，
+        否则只返回已建索引部分的结果，由调用方在索引建完后重新查询。
+        """
+        self.build_search_index_step(0)
+        matches = self.search_index.search(query)
+        pending = self._index_pending
+        if matches is None or not pending:
+            return matches, True
+        if len(pending) > SEARCH_SCAN_LIMIT:
+            return matches, False
+        query = normalize_search_text(query)
+        matches.update(task_id for task_id in pending if task_id in self.content_store
+                       and query in normalize_search_text(self.content_store.get(task_id, cache=False)))
+        return matches, True
+
+    def get_search_index(self):
+        """ 返回完整的搜索索引，尚未建完时同步补齐 """
+        while not self.build_search_index_step(len(self.tasks) + 1):
+            pass
+        return self.search_index
 
     def get_active_tasks(self):
         return [t for t in self.tasks if t['enabled']]
 
+    def collect_due(self, current_datetime):
+        if self.columns is None and np is not None and len(self.tasks) >= COLUMNAR_MIN_TASKS:
+            self.columns = TaskColumns(self.tasks)
+        if self.columns is None:
+            return collect_due_tasks(self.tasks, current_datetime)
+        today_str = current_datetime.date().isoformat()
+        due = [self.tasks[row] for row in self.columns.due_rows(current_datetime).tolist()]
+        for task in due:
+            task['last_triggered'] = today_str
+        return due
+
+    def sync_columns(self, task):
+        if self.columns is not None:
+            self.columns.set_row(self.task_rows[task['id']], task)
+
+    def mark_triggered(self, task, today_str):
+        task['last_triggered'] = today_str
+        self.sync_columns(task)
+
+    def apply_due(self, due_ids, current_datetime):
+        """ 把分片求值返回的 (时间, 任务 id) 落到本地任务上，记录触发日期 """
+        today_str = current_datetime.date().isoformat()
+        due = []
+        for _, task_id in due_ids:
+            task = self.get_task(task_id)
+            if task is not None:
+                self.mark_triggered(task, today_str)
+                due.append(task)
+        return due
+
+class TaskListManager:
+    """ 管理多个任务清单，每个清单是一个独立的 TaskData 分片
+
+    停用的清单不加载；收起的清单也不加载，只在清单目录中保留它的触发时刻集合，
+    某个时刻到期时才加载对应分片。调度器合并所有已加载分片的到期任务。
+    """
+    def __init__(self, lists_file=LISTS_FILE, default_data_file=DATA_FILE):
+        self.lists_file = lists_file
+        self.default_data_file = default_data_file
+        self.base_dir = os.path.dirname(lists_file)
+        self.lists = []
+        self.next_id = 1
+        self.id_limit = 1     # 清单目录中记录的 id 上限，之前的 id 可能已经分配出去
+        self.shards = {}      # 清单名 -> TaskData，仅包含已加载的清单
+        self.slot_sets = {}   # 收起的清单名 -> {"星期|HH:MM", ...}
+        self.woken_lists = []
+        self.load_manifest()
+
+    def load_manifest(self):
+        try:
+            if os.path.exists(self.lists_file):
+                with open(self.lists_file, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                self.lists = manifest.get('lists', [])
+                self.next_id = self.id_limit = manifest.get('next_id', 1)
+        except Exception as e:
+            print(f"加载清单目录失败: {e}")
+            self.lists = []
+        if not self.lists:
+            # 首次运行：原有的数据文件作为默认清单
+            self.lists = [{'name': DEFAULT_LIST_NAME, 'file': os.path.relpath(self.default_data_file, self.base_dir),
+                           'enabled': True, 'collapsed': False}]
+        for entry in self.lists:
+            if entry.get('enabled', True) and not entry.get('collapsed', False):
+                self.load_list(entry['name'])
+            elif entry.get('enabled', True):
+                self.slot_sets[entry['name']] = set(entry.get('slots', []))
+        self.save_manifest()
+
+    def save_manifest(self):
+        try:
+            tmp_path = self.lists_file + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'next_id': max(self.next_id, self.id_limit), 'lists': self.lists}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.lists_file)
+        except Exception as e:
+            print(f"保存清单目录失败: {e}")
+
+    def get_entry(self, name):
+        for entry in self.lists:
+            if entry['name'] == name:
+                return entry
+        return None
+
+    def visible_lists(self):
+        """ 在界面中展开显示的清单名 """
+        return [e['name'] for e in self.lists
+                if e.get('enabled', True) and not e.get('collapsed', False) and e['name'] in self.shards]
+
+    def allocate_id(self, minimum=1, count=1):
+        """ 分配 count 个连续的 id，返回第一个
+
+        清单目录中预先记下一段 id 的上限，用完这一段才重写清单目录，批量添加时不必每个 id 保存一次。
+        异常退出后从记下的上限继续分配，跳过的 id 不会再被使用。
+        """
+        task_id = max(self.next_id, minimum)
+        self.next_id = task_id + count
+        if self.next_id > self.id_limit:
+            self.id_limit = self.next_id + ID_RESERVE_BLOCK
+            self.save_manifest()
+        return task_id
+
+    def load_list(self, name):
+        if name in self.shards:
+            return self.shards[name]
+        entry = self.get_entry(name)
+        shard = TaskData(os.path.join(self.base_dir, entry['file']), id_allocator=self.allocate_id)
+        self.shards[name] = shard
+        self.next_id = max(self.next_id, shard.max_id + 1)
+        return shard
+
+    def unload_list(self, name):
+        """ 卸载分片，返回被卸载的任务 id 列表 """
+        shard = self.shards.pop(name, None)
+        if shard is None:
+            return []
+        task_ids = [t['id'] for t in shard.tasks]
+        shard.close()
+        return task_ids
+
+    def create_list(self, name):
+        if self.get_entry(name) is not None:
+            raise ValueError(f"清单已存在: {name}")
+        os.makedirs(os.path.join(self.base_dir, os.path.basename(LISTS_DIR)), exist_ok=True)
+        index = len(self.lists) + 1
+        while True:
+            relative = os.path.join(os.path.basename(LISTS_DIR), f"list_{index}.json")
+            if not os.path.exists(os.path.join(self.base_dir, relative)):
+                break
+            index += 1
+        self.lists.append({'name': name, 'file': relative, 'enabled': True, 'collapsed': False})
+        self.save_manifest()
+        return self.load_list(name)
+
+    def set_list_state(self, name, enabled, collapsed):
+        """ 修改清单的启用/收起状态，返回 (新加载的分片, 被卸载的任务 id 列表) """
+        entry = self.get_entry(name)
+        loaded, unloaded = None, []
+        entry['enabled'] = enabled
+        entry['collapsed'] = collapsed
+        self.slot_sets.pop(name, None)
+        if enabled and not collapsed:
+            entry.pop('slots', None)
+            if name not in self.shards:
+                loaded = self.load_list(name)
+        else:
+            if enabled:
+                # 收起前记下所有启用任务的触发时刻，之后无需加载即可判断是否到期
+                shard = self.shards.get(name) or self.load_list(name)
+                slots = sorted({f"{w}|{t['time']}" for t in shard.tasks if t['enabled'] for w in t['weekdays']})
+                entry['slots'] = slots
+                self.slot_sets[name] = set(slots)
+            unloaded = self.unload_list(name)
+        self.save_manifest()
+        return loaded, unloaded
+
+    def merge_feed(self, name, feed_tasks):
+        """ 把订阅源合并到指定清单，清单不存在时新建；返回 (合并结果, 被卸载的任务 id 列表) """
+        entry = self.get_entry(name)
+        if entry is None:
+            self.create_list(name)
+            entry = self.get_entry(name)
+        result = self.load_list(name).merge_feed(feed_tasks)
+        unloaded = []
+        if not entry.get('enabled', True) or entry.get('collapsed', False):
+            # 停用或收起的清单合并后恢复原状态，收起的清单同时更新触发时刻集合
+            _, unloaded = self.set_list_state(name, entry.get('enabled', True), entry.get('collapsed', False))
+        return result, unloaded
+
+    def iter_tasks(self):
+        for shard in self.shards.values():
+            yield from shard.tasks
+
+    def task_count(self):
+        return sum(len(shard.tasks) for shard in self.shards.values())
+
+    def owner_of(self, task_id):
+        for shard in self.shards.values():
+            if task_id in shard.task_rows:
+                return shard
+        return None
+
+    def get_task(self, task_id):
+        shard = self.owner_of(task_id)
+        return None if shard is None else shard.get_task(task_id)
+
+    def get_content(self, task):
+        if 'content' in task:
+            return task['content']
+        shard = self.owner_of(task['id'])
+        return "" if shard is None else shard.get_content(task)
+
+    def collect_due(self, current_datetime, evaluator=None):
+        """ 合并所有已加载分片的到期任务，收起的清单在其触发时刻到来时才加载
+
+        传入 evaluator 时由工作进程求值，结果按清单和任务顺序排列，与进程内求值一致。
+        """
+        slot = f"{current_datetime.weekday()}|{current_datetime:%H:%M}"
+        self.woken_lists = []
+        for name, slots in list(self.slot_sets.items()):
+            if slot in slots and name not in self.shards:
+                self.load_list(name)
+                self.woken_lists.append(name)
+        due = []
+        if evaluator is None:
+            for shard in self.shards.values():
+                due.extend(shard.collect_due(current_datetime))
+            return due
+        try:
+            for name in self.woken_lists:
+                evaluator.upsert(self.shards[name].tasks)
+            window = evaluator.due_in_window(current_datetime, current_datetime + datetime.timedelta(minutes=1),
+                                             timeout=EVAL_REPLY_TIMEOUT)
+        except EvaluatorError as e:
+            # 本次改在进程内求值，evaluator.broken 提示调用方重建工作进程
+            print(f"分片求值失败，改为进程内求值: {e}")
+            for shard in self.shards.values():
+                due.extend(shard.collect_due(current_datetime))
+            return due
+        order = {id(shard): index for index, shard in enumerate(self.shards.values())}
+        for _, task_id in window:
+            shard = self.owner_of(task_id)
+            if shard is not None:
+                due.append((order[id(shard)], shard.task_rows[task_id], shard))
+        due.sort(key=lambda item: item[:2])
+        today_str = current_datetime.date().isoformat()
+        for _, row, shard in due:
+            shard.mark_triggered(shard.tasks[row], today_str)
+        return [shard.tasks[row] for _, row, shard in due]
+
+    def collapse_woken(self, due):
+        """ 把本次被唤醒的收起清单重新卸载，只保留触发时刻集合，返回被卸载的任务 id 列表
+
+        到期任务的正文先复制到任务上，之后显示弹窗或稍后提醒时不需要再加载清单。
+        """
+        unloaded = []
+        for name in self.woken_lists:
+            shard = self.shards.get(name)
+            if shard is None:
+                continue
+            for task in due:
+                if task['id'] in shard.task_rows:
+                    task['content'] = shard.get_content(task)
+            unloaded.extend(self.unload_list(name))
+        self.woken_lists = []
+        return unloaded
+
+    def save_changes(self, changes):
+        grouped = {}
+        for task_id, fields in changes.items():
+            shard = self.owner_of(task_id)
+            if shard is not None:
+                grouped.setdefault(id(shard), (shard, {}))[1][task_id] = fields
+        for shard, shard_changes in grouped.values():
+            shard.save_changes(shard_changes)
+
+    def close(self):
+        for shard in self.shards.values():
+            shard.close()
+        # 正常退出时记下实际的下一个 id，预留而未用的 id 留给下次
+        self.id_limit = self.next_id
+        self.save_manifest()
+
+def kill_process_tree(proc):
+    """ 结束命令及其启动的所有子进程 """
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                           capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        pass
+    proc.kill()
+
+def run_command(command, timeout):
+    """ 在独立的进程组中执行 shell 命令，返回 (返回码, 输出)；超时时结束整个进程组并抛出 TimeoutExpired
+
+    只结束 shell 的话，子进程仍然占着输出管道，读取输出会一直阻塞到它们退出。
+    """
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    proc = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, errors='replace', **kwargs)
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_tree(proc)
+        try:
+            proc.communicate(timeout=ACTION_KILL_GRACE)
+        except subprocess.TimeoutExpired:
+            # 脱离了进程组的子进程仍占着管道，放弃剩余输出
+            proc.stdout.close()
+            proc.stderr.close()
+            proc.wait()
+        raise
+    return proc.returncode, stdout + stderr
+
+def run_task_action(action, task_id, content):
+    """ 在工作线程中执行任务动作，返回结果字典 """
+    action_type = action.get('type', ACTION_NONE)
+    timeout = action.get('timeout') or ACTION_DEFAULT_TIMEOUT
+    started = datetime.datetime.now()
+    result = {'type': action_type, 'ok': False, 'exit_code': None, 'output': ""}
+    try:
+        if action_type == ACTION_COMMAND:
+            exit_code, output = run_command(action['command'], timeout)
+            result['exit_code'] = exit_code
+            result['output'] = output[-2000:]
+            result['ok'] = exit_code == 0
+        elif action_type == ACTION_WEBHOOK:
+            body = json.dumps({
+                'task_id': task_id,
+                'content': content,
+                'fired_at': started.isoformat(timespec='seconds'),
+            }, ensure_ascii=False).encode('utf-8')
+            request = urllib.request.Request(action['url'], data=body, method='POST',
+                                             headers={'Content-Type': 'application/json; charset=utf-8'})
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                result['exit_code'] = response.status
+                result['output'] = response.read(2000).decode('utf-8', errors='replace')
+                result['ok'] = 200 <= response.status < 300
+        else:
+            result['output'] = f"未知的动作类型: {action_type}"
+    except subprocess.TimeoutExpired:
+        result['output'] = f"执行超时（{timeout} 秒）"
+    except Exception as e:
+        result['output'] = str(e)
+    result['elapsed'] = (datetime.datetime.now() - started).total_seconds()
+    return result
+
+class ActionRunner(QObject):
+    """ 在有界线程池中执行任务动作，通过信号把结果送回界面线程 """
+    action_finished = pyqtSignal(int, dict)
+
+    def __init__(self, max_workers=ACTION_MAX_WORKERS, max_pending=ACTION_MAX_PENDING, parent=None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task-action")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def submit(self, task, content):
+        action = task.get('action')
+        if not action or action.get('type', ACTION_NONE) == ACTION_NONE:
+            return False
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.action_finished.emit(task['id'], {
+                    'type': action.get('type'), 'ok': False, 'exit_code': None,
+                    'output': "动作队列已满，本次未执行", 'elapsed': 0.0,
+                })
+                return False
+            self.pending += 1
+        self.executor.submit(self._run, dict(action), task['id'], content)
+        return True
+
+    def _run(self, action, task_id, content):
+        try:
+            result = run_task_action(action, task_id, content)
+        finally:
+            with self.lock:
+                self.pending -= 1
+        # 跨线程发射信号，Qt 会以排队方式投递到界面线程
+        self.action_finished.emit(task_id, result)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def parse_feed(raw):
+    """ 解析订阅源：任务数组或 {"tasks": [...]}，跳过格式不正确或 id 重复的任务 """
+    data = json.loads(raw.decode('utf-8') if isinstance(raw, bytes) else raw)
+    items = data.get('tasks', []) if isinstance(data, dict) else data
+    tasks, seen = [], set()
+    for item in items:
+        try:
+            if item['id'] in seen:
+                raise ValueError(f"重复的任务 id {item['id']}")
+            weekdays = sorted({int(w) for w in item.get('weekdays', [])})
+            if not weekdays or weekdays[0] < 0 or weekdays[-1] > 6:
+                raise ValueError(f"星期无效 {item.get('weekdays')}")
+            # 到期判断按补零的 HH:MM 字符串比较，"9:00" 之类统一成 "09:00"
+            parsed = datetime.datetime.strptime(item['time'], "%H:%M")
+            priority = int(item.get('priority', PRIORITY_NORMAL))
+            if priority not in PRIORITY_NAMES:
+                raise ValueError(f"优先级无效 {priority}")
+            ack_deadline = item.get('ack_deadline')
+            if ack_deadline is not None and int(ack_deadline) <= 0:
+                raise ValueError(f"确认期限无效 {ack_deadline}")
+            action = item.get('action')
+            # 订阅源来自他人，不允许下发在本机执行的命令
+            if not isinstance(action, dict) or action.get('type') not in (ACTION_NONE, ACTION_WEBHOOK):
+                action = None
+            tasks.append({
+                'id': item['id'],
+                'content': str(item.get('content', '')),
+                'weekdays': weekdays,
+                'time': f"{parsed.hour:02d}:{parsed.minute:02d}",
+                'enabled': bool(item.get('enabled', True)),
+                'action': action,
+                'priority': priority,
+                'ack_deadline': int(ack_deadline) if ack_deadline is not None else None,
+            })
+            seen.add(item['id'])
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"跳过格式不正确的订阅任务: {e}")
+    return tasks
+
+class FeedFetcher:
+    """ 条件拉取订阅源：HTTP 带 ETag/Last-Modified 校验，本地文件比较修改时间和大小 """
+    def __init__(self, source, timeout=SYNC_TIMEOUT):
+        self.source = source
+        self.timeout = timeout
+        self.etag = None
+        self.last_modified = None
+        self.file_stamp = None
+
+    def fetch(self):
+        """ 返回订阅源中的任务列表，源未变化时返回 None，出错时抛出异常 """
+        if self.source.startswith(('http://', 'https://')):
+            return self.fetch_url()
+        return self.fetch_file()
+
+    def fetch_file(self):
+        path = self.source[len("file://"):] if self.source.startswith("file://") else self.source
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self.file_stamp:
+            return None
+        with open(path, 'rb') as f:
+            tasks = parse_feed(f.read())
+        self.file_stamp = stamp
+        return tasks
+
+    def fetch_url(self):
+        request = urllib.request.Request(self.source, headers={'Accept': 'application/json'})
+        if self.etag:
+            request.add_header('If-None-Match', self.etag)
+        if self.last_modified:
+            request.add_header('If-Modified-Since', self.last_modified)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+        tasks = parse_feed(body)
+        # 解析成功后才记录校验值，解析失败时下次会重新下载
+        self.etag = headers.get('ETag')
+        self.last_modified = headers.get('Last-Modified')
+        return tasks
+
+class FeedSync(QObject):
+    """ 在后台线程定期拉取订阅源，连续出错时指数退避，结果通过信号送回界面线程 """
+    feed_received = pyqtSignal(list)
+    sync_failed = pyqtSignal(str)
+
+    def __init__(self, source, interval=SYNC_INTERVAL_DEFAULT, max_backoff=SYNC_MAX_BACKOFF, parent=None):
+        super().__init__(parent)
+        self.fetcher = FeedFetcher(source)
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.worker = threading.Thread(target=self.run, name="feed-sync", daemon=True)
+
+    def start(self):
+        self.worker.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+
+    def sync_now(self):
+        self.wake_event.set()
+
+    def next_delay(self):
+        if not self.failures:
+            return self.interval
+        # 随机抖动避免多台机器在订阅源恢复时同时重试
+        delay = min(self.interval * 2 ** self.failures, self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                tasks = self.fetcher.fetch()
+                self.failures = 0
+                # 拉取期间可能已经调用了 stop()，停止后不再把结果送回界面
+                if tasks is not None and not self.stop_event.is_set():
+                    self.feed_received.emit(tasks)
+            except Exception as e:
+                self.failures += 1
+                if not self.stop_event.is_set():
+                    self.sync_failed.emit(str(e))
+            self.wake_event.wait(self.next_delay())
+            self.wake_event.clear()
+
+class HistoryStore:
+    """ 触发历史：按天分段的定长记录文件
+
+    每条记录为 <任务id:int32><计划时间><实际时间><确认时间:int64 秒><结果:uint8>，
+    记录只追加，确认时仅回填该条记录的确认时间和结果。
+    启动时只按文件大小得出每个分段的记录条数，不读取内容；
+    按任务查询时才读取涉及的分段并缓存其中每个任务的记录位置。
+    """
+    RECORD = struct.Struct('<iqqqB')
+    SUFFIX = ".hist"
+
+    def __init__(self, directory, retention_days=HISTORY_RETENTION_DAYS, clock=None):
+        self.directory = directory
+        self.retention_days = retention_days
+        # 保留期按调度器的时钟计算，回放时不会误删模拟日期的记录
+        self.clock = clock or SystemClock()
+        self.segment_counts = {}  # 分段日期键 -> 记录条数
+        self.segment_tasks = {}   # 已读取的分段日期键 -> {任务id: [记录序号, ...]}
+        self.purged_before = None
+        os.makedirs(self.directory, exist_ok=True)
+        self.purge_expired()
+        self._scan_segments()
+
+    def _segment_path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    @staticmethod
+    def _day_key(dt):
+        return dt.strftime("%Y%m%d")
+
+    @staticmethod
+    def _to_epoch(dt):
+        return int(dt.timestamp()) if dt else 0
+
+    @staticmethod
+    def _from_epoch(value):
+        return datetime.datetime.fromtimestamp(value) if value else None
+
+    def _segment_keys(self):
+        return sorted(name[:-len(self.SUFFIX)] for name in os.listdir(self.directory)
+                      if name.endswith(self.SUFFIX))
+
+    def _scan_segments(self):
+        self.segment_counts.clear()
+        self.segment_tasks.clear()
+        for key in self._segment_keys():
+            path = self._segment_path(key)
+            size = os.path.getsize(path)
+            count = size // self.RECORD.size
+            if size != count * self.RECORD.size:
+                # 写入中途退出时末尾可能有不完整的记录，截掉后追加的记录才能按序号定位
+                print(f"历史分段 {key} 末尾有不完整的记录，已截断")
+                os.truncate(path, count * self.RECORD.size)
+            self.segment_counts[key] = count
+
+    def _task_positions(self, key):
+        """ 分段内每个任务的记录序号，首次用到时读取分段文件 """
+        positions = self.segment_tasks.get(key)
+        if positions is None:
+            positions = {}
+            count = self.segment_counts.get(key, 0)
+            with open(self._segment_path(key), 'rb') as f:
+                data = f.read(count * self.RECORD.size)
+            for i, (task_id, *_rest) in enumerate(self.RECORD.iter_unpack(data)):
+                positions.setdefault(task_id, []).append(i)
+            self.segment_tasks[key] = positions
+        return positions
+
+    def purge_expired(self, now=None):
+        """ 删除超过保留期的整段文件 """
+        now = now or self.clock.now()
+        cutoff = self._day_key(now - datetime.timedelta(days=self.retention_days))
+        if self.purged_before == cutoff:
+            return
+        self.purged_before = cutoff
+        for key in self._segment_keys():
+            if key >= cutoff:
+                break
+            try:
+                os.remove(self._segment_path(key))
+                self.segment_counts.pop(key, None)
+                self.segment_tasks.pop(key, None)
+            except OSError as e:
+                print(f"删除过期历史失败: {e}")
+
+    def record_firing(self, task_id, scheduled, actual=None, outcome=HISTORY_FIRED):
+        """ 追加一条触发记录，返回用于回填确认信息的句柄 """
+        actual = actual or self.clock.now()
+        self.purge_expired(actual)
+        key = self._day_key(actual)
+        with open(self._segment_path(key), 'ab') as f:
+            f.write(self.RECORD.pack(task_id, self._to_epoch(scheduled), self._to_epoch(actual), 0, outcome))
+        index = self.segment_counts.get(key, 0)
+        self.segment_counts[key] = index + 1
+        if key in self.segment_tasks:
+            self.segment_tasks[key].setdefault(task_id, []).append(index)
+        return (key, index)
+
+    def mark(self, handle, outcome, acknowledged=None):
+        """ 回填确认时间和结果 """
+        key, index = handle
+        path = self._segment_path(key)
+        if not os.path.exists(path):
+            return
+        offset = index * self.RECORD.size
+        with open(path, 'r+b') as f:
+            f.seek(offset)
+            raw = f.read(self.RECORD.size)
+            if len(raw) < self.RECORD.size:
+                return
+            task_id, scheduled, actual, _, _ = self.RECORD.unpack(raw)
+            f.seek(offset)
+            f.write(self.RECORD.pack(task_id, scheduled, actual, self._to_epoch(acknowledged), outcome))
+
+    def _read(self, key, start, stop):
+        """ 读取分段中 [start, stop) 的记录 """
+        if stop <= start:
+            return []
+        with open(self._segment_path(key), 'rb') as f:
+            f.seek(start * self.RECORD.size)
+            data = f.read((stop - start) * self.RECORD.size)
+        records = []
+        for task_id, scheduled, actual, acknowledged, outcome in self.RECORD.iter_unpack(data):
+            records.append({
+                'task_id': task_id,
+                'scheduled': self._from_epoch(scheduled),
+                'actual': self._from_epoch(actual),
+                'acknowledged': self._from_epoch(acknowledged),
+                'outcome': outcome,
+            })
+        return records
+
+    def _actual_at(self, f, index):
+        f.seek(index * self.RECORD.size)
+        return self.RECORD.unpack(f.read(self.RECORD.size))[2]
+
+    def _bound(self, key, epoch):
+        """ 在分段内二分查找第一条实际时间 >= epoch 的记录序号 """
+        lo, hi = 0, self.segment_counts.get(key, 0)
+        with open(self._segment_path(key), 'rb') as f:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._actual_at(f, mid) < epoch:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        return lo
+
+    def _range_spans(self, start, end):
+        """ 计算 [start, end) 内每个分段的记录区间 """
+        start_key, end_key = self._day_key(start), self._day_key(end)
+        spans = []
+        for key in sorted(self.segment_counts):
+            if key < start_key or key > end_key:
+                continue
+            lo = self._bound(key, self._to_epoch(start)) if key == start_key else 0
+            hi = self._bound(key, self._to_epoch(end)) if key == end_key else self.segment_counts[key]
+            if hi > lo:
+                spans.append((key, lo, hi))
+        return spans
+
+    def count_range(self, start, end):
+        return sum(hi - lo for _, lo, hi in self._range_spans(start, end))
+
+    def query_range(self, start, end, offset=0, limit=HISTORY_PAGE_SIZE):
+        """ 按时间倒序分页查询 [start, end) 内的记录 """
+        records = []
+        for key, lo, hi in reversed(self._range_spans(start, end)):
+            count = hi - lo
+            if offset >= count:
+                offset -= count
+                continue
+            stop = hi - offset
+            begin = max(lo, stop - (limit - len(records)))
+            records.extend(reversed(self._read(key, begin, stop)))
+            offset = 0
+            if len(records) >= limit:
+                break
+        return records
+
+    def count_task(self, task_id):
+        return sum(len(self._task_positions(key).get(task_id, ())) for key in sorted(self.segment_counts))
+
+    def last_firings(self, task_id, n=HISTORY_PAGE_SIZE, offset=0):
+        """ 按时间倒序返回某个任务最近的 n 条记录，从最新的分段往前读，够数即停 """
+        records = []
+        for key in sorted(self.segment_counts, reverse=True):
+            indexes = self._task_positions(key).get(task_id, [])
+            if offset >= len(indexes):
+                offset -= len(indexes)
+                continue
+            stop = len(indexes) - offset
+            for index in reversed(indexes[max(0, stop - (n - len(records))):stop]):
+                records.extend(self._read(key, index, index + 1))
+            offset = 0
+            if len(records) >= n:
+                break
+        return records
+
+class TimingWheel:
+    """ 分层时间轮：插入和取消都是 O(1)，所有待提醒项共用一个定时器推进
+
+    第 0 层每格 1 个 tick，上一层每格覆盖下一层一整圈；
+    到期时间超出总跨度的条目放在最高层，转到时重新分配。
+    """
+    def __init__(self, tick_seconds=1, level_sizes=(60, 60, 24, 32), start=0):
+        self.tick_seconds = tick_seconds
+        self.level_sizes = level_sizes
+        self.units = []  # 每层一格对应的 tick 数
+        unit = 1
+        for size in level_sizes:
+            self.units.append(unit)
+            unit *= size
+        self.span = unit
+        self.levels = [[{} for _ in range(size)] for size in level_sizes]
+        self.locations = {}  # key -> (层, 格)
+        self.current = self.to_tick(start)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, key):
+        return key in self.locations
+
+    def to_tick(self, timestamp):
+        return int(timestamp // self.tick_seconds)
+
+    def _place(self, key, expire, payload):
+        delta = expire - self.current
+        level = len(self.level_sizes) - 1
+        for i, size in enumerate(self.level_sizes):
+            if delta < self.units[i] * size:
+                level = i
+                break
+        # 已到期的条目放进下一格，在下一次推进时取出
+        target = max(expire, self.current + 1)
+        slot = (target // self.units[level]) % self.level_sizes[level]
+        self.levels[level][slot][key] = (expire, payload)
+        self.locations[key] = (level, slot)
+
+    def add(self, key, timestamp, payload=None):
+        """ 在 timestamp 时刻到期，相同 key 会替换原有条目 """
+        self.cancel(key)
+        self._place(key, self.to_tick(timestamp), payload)
+
+    def cancel(self, key):
+        location = self.locations.pop(key, None)
+        if location is None:
+            return None
+        level, slot = location
+        return self.levels[level][slot].pop(key)[1]
+
+    def advance(self, timestamp):
+        """ 推进到 timestamp，返回到期的 [(key, payload), ...] """
+        target = self.to_tick(timestamp)
+        due = []
+        if not self.locations:
+            self.current = max(self.current, target)
+            return due
+        while self.current < target:
+            self.current += 1
+            # 先把高层当前格的条目下放，再处理第 0 层
+            for level in range(len(self.level_sizes) - 1, 0, -1):
+                if self.current % self.units[level] == 0:
+                    slot = (self.current // self.units[level]) % self.level_sizes[level]
+                    bucket = self.levels[level][slot]
+                    self.levels[level][slot] = {}
+                    for key, (expire, payload) in bucket.items():
+                        del self.locations[key]
+                        if expire <= self.current:
+                            due.append((key, payload))
+                        else:
+                            self._place(key, expire, payload)
+            slot = self.current % self.level_sizes[0]
+            bucket = self.levels[0][slot]
+            if bucket:
+                self.levels[0][slot] = {}
+                for key, (expire, payload) in bucket.items():
+                    del self.locations[key]
+                    if expire <= self.current:
+                        due.append((key, payload))
+                    else:
+                        self._place(key, expire, payload)
+            if not self.locations:
+                self.current = target
+        return due
+
+class MessageRateLimiter:
+    """ 滑动窗口限流：window 秒内最多放行 budget 条消息 """
+    def __init__(self, budget=MESSAGE_BUDGET_DEFAULT, window=MESSAGE_BUDGET_WINDOW):
+        self.budget = budget
+        self.window = window
+        self.sent = deque()
+
+    def _expire(self, now):
+        while self.sent and self.sent[0] <= now - self.window:
+            self.sent.popleft()
+
+    def remaining(self, now):
+        self._expire(now)
+        return max(0, self.budget - len(self.sent))
+
+    def acquire(self, now, count=1):
+        """ 预算足够放行 count 条时记账并返回 True """
+        if self.remaining(now) < count:
+            return False
+        self.sent.extend([now] * count)
+        return True
+
+def get_diagnostics_logger(path=DIAGNOSTICS_LOG):
+    """ 写入诊断日志的 logger，按大小滚动 """
+    logger = logging.getLogger("diagnostics")
+    if not logger.handlers:
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=DIAGNOSTICS_LOG_MAX_BYTES, backupCount=DIAGNOSTICS_LOG_BACKUPS, encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+class ProfilingHooks:
+    """ 按需开启的性能分析：cProfile 只包住调度和界面刷新，tracemalloc 对比前后快照 """
+    def __init__(self, output_dir=PROFILE_DIR, top_n=PROFILE_TOP_N):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.profile = None
+        self.depth = 0
+        self.baseline = None
+        self.started_tracemalloc = False
+        self.started_at = None
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def start(self):
+        if self.active:
+            return
+        self.profile = cProfile.Profile()
+        self.depth = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            self.started_tracemalloc = True
+        self.baseline = tracemalloc.take_snapshot()
+        self.started_at = datetime.datetime.now()
+        print("性能分析已开始")
+
+    def run(self, func, *args, **kwargs):
+        """ 在分析期间包住一次调用，支持嵌套 """
+        if self.profile is None:
+            return func(*args, **kwargs)
+        profile = self.profile
+        self.depth += 1
+        if self.depth == 1:
+            profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                profile.disable()
+
+    def stop(self):
+        """ 结束分析并写出结果文件，返回文件路径列表 """
+        if not self.active:
+            return []
+        profile, self.profile = self.profile, None
+        snapshot = tracemalloc.take_snapshot()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+        stamp = self.started_at.strftime("%Y%m%d-%H%M%S")
+        os.makedirs(self.output_dir, exist_ok=True)
+        prof_path = os.path.join(self.output_dir, f"profile-{stamp}.prof")
+        text_path = os.path.join(self.output_dir, f"profile-{stamp}.txt")
+        memory_path = os.path.join(self.output_dir, f"memory-{stamp}.txt")
+        duration = (datetime.datetime.now() - self.started_at).total_seconds()
+        try:
+            profile.dump_stats(prof_path)
+            buffer = io.StringIO()
+            stats = pstats.Stats(profile, stream=buffer)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(50)
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write(f"采集时长: {duration:.1f}s\n")
+                f.write(buffer.getvalue())
+
+            diff = snapshot.compare_to(self.baseline, 'lineno')
+            with open(memory_path, 'w', encoding='utf-8') as f:
+                current = sum(stat.size for stat in snapshot.statistics('filename'))
+                f.write(f"采集时长: {duration:.1f}s，当前追踪内存 {current / 1024:.1f}KB\n")
+                f.write(f"内存增长最多的 {self.top_n} 处:\n")
+                for stat in diff[:self.top_n]:
+                    f.write(f"{stat}\n")
+        except Exception as e:
+            print(f"写入性能分析结果失败: {e}")
+            return []
+        finally:
+            self.baseline = None
+        print(f"性能分析结果已写入: {prof_path}, {memory_path}")
+        return [prof_path, text_path, memory_path]
+
+# 全局唯一的分析开关，调度和界面刷新的入口通过 profiled 装饰
+profiling = ProfilingHooks()
+
+def profiled(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return profiling.run(func, *args, **kwargs)
+    return wrapper
+
+class MainThreadWatchdog(QObject):
+    """ 主线程卡顿监控
+
+    主线程上的心跳定时器记录最后一次跳动时间和事件循环延迟；
+    后台监控线程发现心跳超过阈值未更新时，抓取主线程当前的 Python 调用栈写入诊断日志。
+    """
+    def __init__(self, heartbeat_ms=WATCHDOG_HEARTBEAT_MS, stall_ms=WATCHDOG_STALL_MS, logger=None, parent=None):
+        super().__init__(parent)
+        self.heartbeat_ms = heartbeat_ms
+        self.stall_seconds = stall_ms / 1000
+        self.logger = logger or get_diagnostics_logger()
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.beats = 0
+        self.stalls = 0
+        self.stall_started = None
+        self.stop_event = threading.Event()
+        self.heartbeat = QTimer(self)
+        self.heartbeat.timeout.connect(self.beat)
+        self.monitor = threading.Thread(target=self.run_monitor, name="main-thread-watchdog", daemon=True)
+
+    def start(self):
+        self.last_beat = time.monotonic()
+        self.heartbeat.start(self.heartbeat_ms)
+        self.monitor.start()
+
+    def stop(self):
+        self.heartbeat.stop()
+        self.stop_event.set()
+
+    def beat(self):
+        now = time.monotonic()
+        latency = max(0.0, now - self.last_beat - self.heartbeat_ms / 1000)
+        self.last_beat = now
+        self.beats += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def stats(self):
+        return {
+            'beats': self.beats,
+            'stalls': self.stalls,
+            'avg_latency_ms': self.total_latency / self.beats * 1000 if self.beats else 0.0,
+            'max_latency_ms': self.max_latency * 1000,
+        }
+
+    def run_monitor(self):
+        interval = self.heartbeat_ms / 1000
+        while not self.stop_event.wait(interval):
+            last_beat = self.last_beat
+            blocked = time.monotonic() - last_beat
+            if blocked >= self.stall_seconds:
+                if self.stall_started != last_beat:
+                    # 每次卡顿只抓取一次调用栈
+                    self.stall_started = last_beat
+                    self.stalls += 1
+                    self.report_stall(blocked)
+            elif self.stall_started is not None:
+                stall_length = last_beat - self.stall_started
+                self.logger.info(f"主线程恢复响应，卡顿约 {stall_length * 1000:.0f}ms")
+                self.stall_started = None
+
+    def report_stall(self, blocked):
+        frame = sys._current_frames().get(self.main_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "（无法获取主线程调用栈）"
+        self.logger.warning(f"主线程已 {blocked * 1000:.0f}ms 未响应，当前调用栈:\n{stack}")
+
+class PendingNotification:
+    """ 等待显示的一条提醒或一条汇总提醒，entries 为 [(任务, 历史记录句柄), ...]
+
+    view_only 的提醒只用于重新查看（如点击汇总托盘消息），没有确认期限，关闭时不记录结果。
+    """
+    def __init__(self, entries, label, fired_at, digest=False, view_only=False):
+        self.entries = entries
+        self.label = label
+        self.digest = digest
+        self.view_only = view_only
+        self.priority = max(task.get('priority', PRIORITY_NORMAL) for task, _ in entries)
+        deadlines = [fired_at + datetime.timedelta(minutes=task['ack_deadline'])
+                     for task, _ in entries if task.get('ack_deadline') and not view_only]
+        self.deadline = min(deadlines, default=None)
+        self.overdue = False
+        self.seq = None
+
+    def sort_key(self):
+        # 优先级高的在前，同优先级时确认期限早的在前，最后按到达顺序
+        deadline = self.deadline.timestamp() if self.deadline else float('inf')
+        return (-self.priority, deadline, self.seq)
+
+class NotificationQueue:
+    """ 待显示提醒的优先队列 """
+    def __init__(self):
+        self.heap = []
+        self.next_seq = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __iter__(self):
+        return (item for _, item in self.heap)
+
+    def push(self, item):
+        # 被抢占后重新入队的提醒保留原来的到达顺序
+        if item.seq is None:
+            item.seq = self.next_seq
+            self.next_seq += 1
+        heapq.heappush(self.heap, (item.sort_key(), item))
+
+    def pop(self):
+        return heapq.heappop(self.heap)[1]
+
+    def peek(self):
+        return self.heap[0][1] if self.heap else None
+
+    def reorder(self):
+        """ 队列中提醒的优先级变化后重新排序 """
+        self.heap = [(item.sort_key(), item) for _, item in self.heap]
+        heapq.heapify(self.heap)
+
 class CustomNotification(QDialog):
-    def __init__(self, task, parent=None, is_dark_mode=False):
+    def __init__(self, task, content, parent=None, is_dark_mode=False, deadline=None):
         super().__init__(parent)
         self.task = task
+        self.content = content
         self.is_dark_mode = is_dark_mode
+        self.deadline = deadline
+        self.snooze_minutes = None
         self.setup_ui()
 
     def setup_ui(self):
         self.setWindowTitle("📅 定期提醒")
-        self.setFixedSize(400, 200)
+        self.setFixedSize(460, 220)
         self.setWindowFlags(Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Dialog)
 
         layout = QVBoxLayout(self)
         layout.setSpacing(15)
         layout.setContentsMargins(20, 20, 20, 20)
 
-        # 时间标签
-        time_label = QLabel(f"⏰ {self.task['time']}")
+        # 时间标签，高优先级和确认期限一并显示
+        time_text = f"⏰ {self.task['time']}"
+        if self.task.get('priority', PRIORITY_NORMAL) >= PRIORITY_HIGH:
+            time_text = f"❗ 重要  {time_text}"
+        if self.deadline:
+            time_text += f"  （请在 {self.deadline:%H:%M} 前确认）"
+        time_label = QLabel(time_text)
         time_label.setStyleSheet(f"font-size: 16px; font-weight: bold; color: {'#ecf0f1' if self.is_dark_mode else '#2c3e50'};")
         layout.addWidget(time_label)
 
         # 内容
-        content_label = QLabel(self.task['content'])
+        content_label = QLabel(self.content)
         content_label.setWordWrap(True)
         content_label.setStyleSheet(f"font-size: 14px; color: {'#ecf0f1' if self.is_dark_mode else '#34495e'}; padding: 10px; background-color: {'#2c3e50' if self.is_dark_mode else '#f8f9fa'}; border-radius: 5px;")
         layout.addWidget(content_label)
 
         # 按钮
         btn_layout = QHBoxLayout()
+        snooze_label = QLabel("稍后提醒:")
+        snooze_label.setStyleSheet(f"font-size: 12px; color: {'#ecf0f1' if self.is_dark_mode else '#34495e'};")
+        btn_layout.addWidget(snooze_label)
+        snooze_style = f"""
+            QPushButton {{
+                background-color: {'#34495e' if self.is_dark_mode else '#ecf0f1'};
+                color: {'#ecf0f1' if self.is_dark_mode else '#2c3e50'};
+                border: none;
+                border-radius: 5px;
+                padding: 8px 10px;
+                font-size: 12px;
+            }}
+        """
+        for minutes in SNOOZE_PRESETS:
+            snooze_btn = QPushButton(f"{minutes}分钟")
+            snooze_btn.setStyleSheet(snooze_style)
+            snooze_btn.clicked.connect(lambda _, m=minutes: self.snooze(m))
+            btn_layout.addWidget(snooze_btn)
+        custom_btn = QPushButton("自定义")
+        custom_btn.setStyleSheet(snooze_style)
+        custom_btn.clicked.connect(self.snooze_custom)
+        btn_layout.addWidget(custom_btn)
         btn_layout.addStretch()
 
         ok_btn = QPushButton("知道了")
@@ -187,6 +2548,403 @@ class CustomNotification(QDialog):
         if self.is_dark_mode:
             self.setStyleSheet("background-color: #1e272e;")
 
+    def snooze(self, minutes):
+        self.snooze_minutes = minutes
+        self.reject()
+
+    def snooze_custom(self):
+        minutes, ok = QInputDialog.getInt(self, "稍后提醒", "多少分钟后再次提醒:", 15, 1, SNOOZE_MAX_MINUTES)
+        if ok:
+            self.snooze(minutes)
+
+class DigestNotification(QDialog):
+    """ 同一时刻到期的多条提醒合并显示，确认或稍后提醒对全部条目生效 """
+    def __init__(self, entries, label, parent=None, is_dark_mode=False):
+        super().__init__(parent)
+        self.entries = entries  # [(task, content), ...]
+        self.label = label
+        self.is_dark_mode = is_dark_mode
+        self.snooze_minutes = None
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setWindowTitle("📅 定期提醒汇总")
+        self.resize(520, 420)
+        self.setWindowFlags(Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Dialog)
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(15)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        title_label = QLabel(f"⏰ {self.label} 共有 {len(self.entries)} 条提醒")
+        title_label.setStyleSheet(f"font-size: 16px; font-weight: bold; color: {'#ecf0f1' if self.is_dark_mode else '#2c3e50'};")
+        layout.addWidget(title_label)
+
+        self.entry_list = QListWidget()
+        self.entry_list.setWordWrap(True)
+        self.entry_list.setStyleSheet(f"font-size: 13px; color: {'#ecf0f1' if self.is_dark_mode else '#34495e'}; background-color: {'#2c3e50' if self.is_dark_mode else '#f8f9fa'}; border-radius: 5px;")
+        for task, content in self.entries:
+            self.entry_list.addItem(QListWidgetItem(f"{task['time']}  {content}"))
+        layout.addWidget(self.entry_list)
+
+        btn_layout = QHBoxLayout()
+        for minutes in SNOOZE_PRESETS:
+            snooze_btn = QPushButton(f"全部 {minutes} 分钟后")
+            snooze_btn.clicked.connect(lambda _, m=minutes: self.snooze(m))
+            btn_layout.addWidget(snooze_btn)
+        btn_layout.addStretch()
+        ok_btn = QPushButton("全部知道了")
+        ok_btn.setStyleSheet(f"""
+            QPushButton {{
+                background-color: {'#3498db' if not self.is_dark_mode else '#2980b9'};
+                color: {'#ecf0f1' if self.is_dark_mode else 'white'};
+                border: none;
+                border-radius: 5px;
+                padding: 8px 20px;
+                font-size: 12px;
+                font-weight: bold;
+            }}
+        """)
+        ok_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(ok_btn)
+        layout.addLayout(btn_layout)
+
+        if self.is_dark_mode:
+            self.setStyleSheet("background-color: #1e272e; color: #ecf0f1;")
+
+    def snooze(self, minutes):
+        self.snooze_minutes = minutes
+        self.reject()
+
+def format_task_row(task):
+    weekdays_str = ", ".join([WEEKDAY_NAMES[w] for w in task['weekdays']])
+    status = "✅" if task['enabled'] else "❌"
+    if task.get('priority', PRIORITY_NORMAL) >= PRIORITY_HIGH:
+        status += "❗"
+    item_text = f"{status} {task['preview']} | {weekdays_str} | {task['time']}"
+    if task.get('action'):
+        item_text += " | ⚡"
+    return item_text
+
+def format_action_result(task):
+    """ 任务列表悬停提示：最近一次动作的执行结果 """
+    result = task.get('last_action_result')
+    if not result:
+        return None
+    status = "成功" if result['ok'] else "失败"
+    text = f"上次动作{status}（返回码 {result['exit_code']}，{result['finished_at'].replace('T', ' ')}）"
+    if result.get('output'):
+        text += f"\n{result['output'].strip()}"
+    return text
+
+def build_action(action_type, target):
+    """ 根据界面上的动作类型和目标构造任务动作，仅通知时返回 None """
+    if action_type == ACTION_NONE:
+        return None
+    key = 'command' if action_type == ACTION_COMMAND else 'url'
+    return {'type': action_type, key: target, 'timeout': ACTION_DEFAULT_TIMEOUT}
+
+class TaskListModel(QAbstractListModel):
+    """ 直接以 TaskData.tasks 为数据源，只为可见行生成显示文本 """
+    # 列表中勾选框切换启用状态
+    enabled_toggled = pyqtSignal(int, bool)
+
+    def __init__(self, task_data, parent=None):
+        super().__init__(parent)
+        self.task_data = task_data
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.task_data.tasks)
+
+    def flags(self, index):
+        return super().flags(index) | Qt.ItemFlag.ItemIsUserCheckable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self.task_data.tasks[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return format_task_row(task)
+        if role == Qt.ItemDataRole.UserRole:
+            return task['id']
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return format_action_result(task)
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if task['enabled'] else Qt.CheckState.Unchecked
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        task = self.task_data.tasks[index.row()]
+        self.enabled_toggled.emit(task['id'], Qt.CheckState(value) == Qt.CheckState.Checked)
+        return True
+
+    def reload(self):
+        self.beginResetModel()
+        self.endResetModel()
+
+    def refresh_task(self, task_id):
+        """ 只通知视图刷新一行，代理模型也只重新过滤这一行 """
+        row = self.task_data.task_rows.get(task_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+class UpcomingModel(QAbstractListModel):
+    """ 按下一次触发时间排序的任务视图，数据来自所有已加载的清单
+
+    每个任务的下一次触发时间缓存在 next_fire 中，order 是按 (时间戳, id) 排好序的列表。
+    任务变化时用二分查找定位旧位置和新位置，只移动这一条，不对全部任务重新排序。
+    """
+    def __init__(self, task_data, parent=None):
+        super().__init__(parent)
+        self.task_data = task_data
+        self.next_fire = {}  # 任务id -> 下一次触发时间戳
+        self.order = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.order)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        timestamp, task_id = self.order[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            task = self.task_data.get_task(task_id)
+            if task is None:
+                return None
+            when = datetime.datetime.fromtimestamp(timestamp)
+            return f"{when:%m-%d} {WEEKDAY_NAMES[when.weekday()]} {when:%H:%M} | {task['preview']}"
+        if role == Qt.ItemDataRole.UserRole:
+            return task_id
+        return None
+
+    def rebuild(self, now):
+        self.beginResetModel()
+        self.next_fire.clear()
+        for task in self.task_data.iter_tasks():
+            when = next_fire_time(task, now)
+            if when is not None:
+                self.next_fire[task['id']] = when.timestamp()
+        self.order = sorted((timestamp, task_id) for task_id, timestamp in self.next_fire.items())
+        self.endResetModel()
+
+    def _take(self, task_id):
+        timestamp = self.next_fire.pop(task_id, None)
+        if timestamp is None:
+            return
+        row = bisect.bisect_left(self.order, (timestamp, task_id))
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.order[row]
+        self.endRemoveRows()
+
+    def update_task(self, task, now):
+        """ 重新计算一个任务的下一次触发时间并调整它的位置 """
+        when = next_fire_time(task, now)
+        timestamp = when.timestamp() if when is not None else None
+        old = self.next_fire.get(task['id'])
+        if old == timestamp:
+            if old is not None:
+                # 时间没变，但预览等显示内容可能变了
+                index = self.index(bisect.bisect_left(self.order, (old, task['id'])))
+                self.dataChanged.emit(index, index)
+            return
+        self._take(task['id'])
+        if timestamp is None:
+            return
+        entry = (timestamp, task['id'])
+        row = bisect.bisect_left(self.order, entry)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.order.insert(row, entry)
+        self.endInsertRows()
+        self.next_fire[task['id']] = timestamp
+
+    def remove_task(self, task_id):
+        self._take(task_id)
+
+    def refresh_stale(self, now):
+        """ 错过的触发时间（如休眠期间）都排在最前面，逐个重新计算 """
+        floor = now.replace(second=0, microsecond=0).timestamp()
+        while self.order and self.order[0][0] < floor:
+            task = self.task_data.get_task(self.order[0][1])
+            if task is None:
+                self._take(self.order[0][1])
+            else:
+                self.update_task(task, now)
+
+    def peek(self):
+        """ 返回 (下一次触发时间, 任务)，没有时返回 None """
+        if not self.order:
+            return None
+        timestamp, task_id = self.order[0]
+        return datetime.datetime.fromtimestamp(timestamp), self.task_data.get_task(task_id)
+
+class TaskEditDialog(QDialog):
+    """ 原地编辑任务，也可以从这里删除任务 """
+    def __init__(self, task, content, parent=None, is_dark_mode=False):
+        super().__init__(parent)
+        self.task = task
+        self.content = content
+        self.is_dark_mode = is_dark_mode
+        self.delete_requested = False
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setWindowTitle("✏️ 编辑任务")
+        self.resize(520, 360)
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        layout.addWidget(QLabel("提醒内容:"))
+        self.content_input = QTextEdit()
+        self.content_input.setPlainText(self.content)
+        layout.addWidget(self.content_input)
+
+        week_layout = QHBoxLayout()
+        week_layout.addWidget(QLabel("提醒星期:"))
+        self.weekday_checkboxes = []
+        for i, day in enumerate(WEEKDAY_NAMES):
+            checkbox = QCheckBox(day)
+            checkbox.setChecked(i in self.task['weekdays'])
+            self.weekday_checkboxes.append(checkbox)
+            week_layout.addWidget(checkbox)
+        layout.addLayout(week_layout)
+
+        time_layout = QHBoxLayout()
+        time_layout.addWidget(QLabel("提醒时间:"))
+        self.time_edit = QTimeEdit(QTime.fromString(self.task['time'], "HH:mm"))
+        self.time_edit.setDisplayFormat("HH:mm")
+        time_layout.addWidget(self.time_edit)
+        self.enabled_checkbox = QCheckBox("启用")
+        self.enabled_checkbox.setChecked(self.task['enabled'])
+        time_layout.addWidget(self.enabled_checkbox)
+        time_layout.addStretch()
+        layout.addLayout(time_layout)
+
+        action = self.task.get('action') or {}
+        action_layout = QHBoxLayout()
+        action_layout.addWidget(QLabel("触发动作:"))
+        self.action_combo = QComboBox()
+        self.action_combo.addItem("仅通知", ACTION_NONE)
+        self.action_combo.addItem("执行命令", ACTION_COMMAND)
+        self.action_combo.addItem("调用 Webhook", ACTION_WEBHOOK)
+        self.action_combo.setCurrentIndex(max(0, self.action_combo.findData(action.get('type', ACTION_NONE))))
+        action_layout.addWidget(self.action_combo)
+        self.action_target_input = QLineEdit(action.get('command') or action.get('url') or "")
+        action_layout.addWidget(self.action_target_input)
+        layout.addLayout(action_layout)
+
+        priority_layout = QHBoxLayout()
+        priority_layout.addWidget(QLabel("优先级:"))
+        self.priority_combo = QComboBox()
+        for level, name in PRIORITY_NAMES.items():
+            self.priority_combo.addItem(name, level)
+        self.priority_combo.setCurrentIndex(self.priority_combo.findData(self.task.get('priority', PRIORITY_NORMAL)))
+        priority_layout.addWidget(self.priority_combo)
+        priority_layout.addWidget(QLabel("确认期限(分钟，0 为不限):"))
+        self.ack_deadline_spin = QSpinBox()
+        self.ack_deadline_spin.setRange(0, SNOOZE_MAX_MINUTES)
+        self.ack_deadline_spin.setValue(self.task.get('ack_deadline') or 0)
+        priority_layout.addWidget(self.ack_deadline_spin)
+        priority_layout.addStretch()
+        layout.addLayout(priority_layout)
+
+        btn_layout = QHBoxLayout()
+        delete_btn = QPushButton("🗑 删除任务")
+        delete_btn.clicked.connect(self.request_delete)
+        btn_layout.addWidget(delete_btn)
+        btn_layout.addStretch()
+        cancel_btn = QPushButton("取消")
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+        save_btn = QPushButton("保存")
+        save_btn.setDefault(True)
+        save_btn.clicked.connect(self.validate_and_accept)
+        btn_layout.addWidget(save_btn)
+        layout.addLayout(btn_layout)
+
+        if self.is_dark_mode:
+            self.setStyleSheet("""
+                QDialog {
+                    background-color: #1e272e;
+                    color: #ecf0f1;
+                }
+                QLabel, QCheckBox {
+                    color: #ecf0f1;
+                }
+                QTextEdit, QLineEdit, QTimeEdit, QComboBox {
+                    background-color: #2c3e50;
+                    color: #ecf0f1;
+                    border: 2px solid #34495e;
+                    border-radius: 6px;
+                }
+                QPushButton {
+                    background-color: #3498db;
+                    color: #ecf0f1;
+                    border: none;
+                    border-radius: 5px;
+                    padding: 8px 20px;
+                }
+            """)
+
+    def request_delete(self):
+        self.delete_requested = True
+        self.reject()
+
+    def validate_and_accept(self):
+        if not self.content_input.toPlainText().strip():
+            QMessageBox.warning(self, "警告", "请输入提醒内容！")
+            return
+        if not any(checkbox.isChecked() for checkbox in self.weekday_checkboxes):
+            QMessageBox.warning(self, "警告", "请至少选择一个星期！")
+            return
+        if self.action_combo.currentData() != ACTION_NONE and not self.action_target_input.text().strip():
+            QMessageBox.warning(self, "警告", "请输入要执行的命令或 Webhook 地址！")
+            return
+        self.accept()
+
+    def get_fields(self):
+        return {
+            'content': self.content_input.toPlainText().strip(),
+            'weekdays': [i for i, checkbox in enumerate(self.weekday_checkboxes) if checkbox.isChecked()],
+            'time': self.time_edit.time().toString("HH:mm"),
+            'enabled': self.enabled_checkbox.isChecked(),
+            'action': build_action(self.action_combo.currentData(), self.action_target_input.text().strip()),
+            'priority': self.priority_combo.currentData(),
+            'ack_deadline': self.ack_deadline_spin.value() or None,
+        }
+
+class TaskFilterProxyModel(QSortFilterProxyModel):
+    """ 按搜索结果、星期、时间段和启用状态过滤任务 """
+    def __init__(self, task_data, parent=None):
+        super().__init__(parent)
+        self.task_data = task_data
+        self.match_ids = None  # None 表示不按内容过滤
+        self.weekday = None
+        self.time_range = None
+        self.enabled = None
+
+    def set_filters(self, match_ids=None, weekday=None, time_range=None, enabled=None):
+        self.match_ids = match_ids
+        self.weekday = weekday
+        self.time_range = time_range
+        self.enabled = enabled
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        task = self.task_data.tasks[source_row]
+        if self.match_ids is not None and task['id'] not in self.match_ids:
+            return False
+        if self.weekday is not None and self.weekday not in task['weekdays']:
+            return False
+        if self.time_range is not None and not (self.time_range[0] <= task['time'] <= self.time_range[1]):
+            return False
+        if self.enabled is not None and task['enabled'] != self.enabled:
+            return False
+        return True
+
 class ModernMainWindow(QMainWindow):
     def __init__(self, tray_app):
         super().__init__()
@@ -195,6 +2953,7 @@ class ModernMainWindow(QMainWindow):
         self.setup_ui()
         self.apply_theme()
         self.load_tasks()
+        self.index_timer.start(0)
 
     def setup_ui(self):
         self.setWindowTitle("定期提醒工具")
@@ -238,6 +2997,35 @@ class ModernMainWindow(QMainWindow):
             week_layout.addWidget(checkbox)
         add_layout.addLayout(week_layout)
 
+        # 触发动作
+        action_layout = QHBoxLayout()
+        action_layout.addWidget(QLabel("触发动作:"))
+        self.action_combo = QComboBox()
+        self.action_combo.addItem("仅通知", ACTION_NONE)
+        self.action_combo.addItem("执行命令", ACTION_COMMAND)
+        self.action_combo.addItem("调用 Webhook", ACTION_WEBHOOK)
+        self.action_combo.currentIndexChanged.connect(self.on_action_type_changed)
+        action_layout.addWidget(self.action_combo)
+        self.action_target_input = QLineEdit()
+        self.action_target_input.setEnabled(False)
+        action_layout.addWidget(self.action_target_input)
+        add_layout.addLayout(action_layout)
+
+        # 优先级和确认期限
+        priority_layout = QHBoxLayout()
+        priority_layout.addWidget(QLabel("优先级:"))
+        self.priority_combo = QComboBox()
+        for level, name in PRIORITY_NAMES.items():
+            self.priority_combo.addItem(name, level)
+        self.priority_combo.setCurrentIndex(self.priority_combo.findData(PRIORITY_NORMAL))
+        priority_layout.addWidget(self.priority_combo)
+        priority_layout.addWidget(QLabel("确认期限(分钟，0 为不限):"))
+        self.ack_deadline_spin = QSpinBox()
+        self.ack_deadline_spin.setRange(0, SNOOZE_MAX_MINUTES)
+        priority_layout.addWidget(self.ack_deadline_spin)
+        priority_layout.addStretch()
+        add_layout.addLayout(priority_layout)
+
         # 时间设置
         time_layout = QHBoxLayout()
         time_layout.addWidget(QLabel("提醒时间:"))
@@ -258,13 +3046,94 @@ class ModernMainWindow(QMainWindow):
         # 任务列表区域
         list_group = QGroupBox("当前任务列表")
         list_group.setObjectName("listGroup")
-        list_layout = QVBoxLayout(list_group)
-
-        self.task_list = QListWidget()
+        group_layout = QVBoxLayout(list_group)
+        self.list_tabs = QTabWidget()
+        group_layout.addWidget(self.list_tabs)
+        all_tab = QWidget()
+        list_layout = QVBoxLayout(all_tab)
+        list_layout.setContentsMargins(0, 8, 0, 0)
+
+        # 清单选择
+        list_select_layout = QHBoxLayout()
+        list_select_layout.addWidget(QLabel("任务清单:"))
+        self.list_combo = QComboBox()
+        self.list_combo.currentIndexChanged.connect(self.switch_list)
+        list_select_layout.addWidget(self.list_combo, 1)
+        self.manage_lists_btn = QPushButton("🗂 管理清单")
+        self.manage_lists_btn.clicked.connect(self.manage_lists)
+        list_select_layout.addWidget(self.manage_lists_btn)
+        list_layout.addLayout(list_select_layout)
+
+        # 搜索与筛选
+        filter_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 搜索提醒内容...")
+        self.search_input.textChanged.connect(self.schedule_filter)
+        filter_layout.addWidget(self.search_input)
+        self.weekday_filter = QComboBox()
+        self.weekday_filter.addItem("全部星期", None)
+        for i, day in enumerate(WEEKDAY_NAMES):
+            self.weekday_filter.addItem(day, i)
+        self.weekday_filter.currentIndexChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.weekday_filter)
+        self.time_filter_checkbox = QCheckBox("时间段")
+        self.time_filter_checkbox.stateChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.time_filter_checkbox)
+        self.time_from_edit = QTimeEdit(QTime(0, 0))
+        self.time_from_edit.setDisplayFormat("HH:mm")
+        self.time_from_edit.timeChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.time_from_edit)
+        self.time_to_edit = QTimeEdit(QTime(23, 59))
+        self.time_to_edit.setDisplayFormat("HH:mm")
+        self.time_to_edit.timeChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.time_to_edit)
+        self.enabled_filter = QComboBox()
+        self.enabled_filter.addItem("全部状态", None)
+        self.enabled_filter.addItem("已启用", True)
+        self.enabled_filter.addItem("已停用", False)
+        self.enabled_filter.currentIndexChanged.connect(self.apply_filter)
+        filter_layout.addWidget(self.enabled_filter)
+        list_layout.addLayout(filter_layout)
+
+        # 输入停顿后再过滤，连续打字时不重复查询
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_filter)
+
+        # 搜索索引要读取全部正文，启动后利用空闲时间分批建立；
+        # 建完之前的查询不等待，只返回能立即得到的结果，建完后再重新过滤
+        self.index_timer = QTimer(self)
+        self.index_timer.timeout.connect(self.build_search_index_step)
+        self.refilter_when_indexed = False
+
+        self.task_model = TaskListModel(self.task_data, self)
+        self.task_model.enabled_toggled.connect(lambda task_id, enabled: self.update_task(task_id, enabled=enabled))
+        self.task_proxy = TaskFilterProxyModel(self.task_data, self)
+        self.task_proxy.setSourceModel(self.task_model)
+        self.refresh_list_combo()
+        self.task_list = QListView()
         self.task_list.setObjectName("taskList")
-        self.task_list.itemDoubleClicked.connect(self.remove_task)
+        self.task_list.setModel(self.task_proxy)
+        self.task_list.setUniformItemSizes(True)
+        self.task_list.setToolTip("双击编辑任务，勾选框切换启用状态，右键查看更多操作")
+        self.task_list.doubleClicked.connect(self.edit_task)
+        self.task_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.task_list.customContextMenuRequested.connect(self.show_task_menu)
         list_layout.addWidget(self.task_list)
 
+        self.filter_count_label = QLabel()
+        list_layout.addWidget(self.filter_count_label)
+        self.list_tabs.addTab(all_tab, "全部任务")
+
+        # 即将提醒：按下一次触发时间排序
+        self.upcoming_list = QListView()
+        self.upcoming_list.setObjectName("taskList")
+        self.upcoming_list.setModel(self.tray_app.upcoming_model)
+        self.upcoming_list.setUniformItemSizes(True)
+        self.upcoming_list.doubleClicked.connect(self.edit_task)
+        self.list_tabs.addTab(self.upcoming_list, "⏭ 即将提醒")
+
         main_layout.addWidget(list_group)
 
         # 底部按钮区域
@@ -273,8 +3142,11 @@ class ModernMainWindow(QMainWindow):
         # 开机自启动复选框
         self.startup_checkbox = QCheckBox("⚙️ 开机自启动")
         self.startup_checkbox.setObjectName("startupCheckbox")
-        self.startup_checkbox.setChecked(self.is_startup_enabled())
+        # 先显示缓存的状态，后台检查完成后再更新
+        self.startup_checkbox.setChecked(self.tray_app.platform.startup_enabled)
         self.startup_checkbox.stateChanged.connect(self.toggle_startup)
+        self.tray_app.platform.startup_checked.connect(self.on_startup_checked)
+        self.tray_app.platform.startup_set.connect(self.on_startup_set)
         btn_layout.addWidget(self.startup_checkbox)
 
         # 测试通知按钮
@@ -283,6 +3155,12 @@ class ModernMainWindow(QMainWindow):
         self.test_notification_btn.clicked.connect(self.show_test_notification)
         btn_layout.addWidget(self.test_notification_btn)
 
+        # 触发历史按钮
+        self.history_btn = QPushButton("📜 触发历史")
+        self.history_btn.setObjectName("historyButton")
+        self.history_btn.clicked.connect(self.show_history)
+        btn_layout.addWidget(self.history_btn)
+
         btn_layout.addStretch()
 
         self.minimize_btn = QPushButton("🔽 最小化到托盘")
@@ -302,10 +3180,11 @@ class ModernMainWindow(QMainWindow):
         is_dark = False
         
         if theme == THEME_SYSTEM:
-            is_dark = is_windows_dark_mode()
+            is_dark = self.tray_app.platform.dark_mode
         elif theme == THEME_DARK:
             is_dark = True
-            
+
+        self.is_dark_mode = is_dark
         if is_dark:
             self.apply_dark_style()
         else:
@@ -429,6 +3308,20 @@ class ModernMainWindow(QMainWindow):
             background-color: #2980b9;
         }
 
+        #historyButton {
+            background-color: #16a085;
+            color: white;
+            border: none;
+            border-radius: 6px;
+            padding: 10px 20px;
+            font-size: 12px;
+            font-weight: bold;
+        }
+
+        #historyButton:hover {
+            background-color: #138d75;
+        }
+
         #minimizeButton {
             background-color: #f39c12;
             color: white;
@@ -466,16 +3359,16 @@ class ModernMainWindow(QMainWindow):
             font-size: 12px;
         }
 
-        QListWidget::item {
+        QListView::item {
             padding: 10px;
             border-bottom: 1px solid #ecf0f1;
         }
 
-        QListWidget::item:hover {
+        QListView::item:hover {
             background-color: #e8f4fd;
         }
 
-        QListWidget::item:selected {
+        QListView::item:selected {
             background-color: #3498db;
             color: white;
         }
@@ -626,6 +3519,20 @@ class ModernMainWindow(QMainWindow):
             background-color: #2980b9;
         }
 
+        #historyButton {
+            background-color: #16a085;
+            color: #ecf0f1;
+            border: none;
+            border-radius: 6px;
+            padding: 10px 20px;
+            font-size: 12px;
+            font-weight: bold;
+        }
+
+        #historyButton:hover {
+            background-color: #138d75;
+        }
+
         #minimizeButton {
             background-color: #d35400;
             color: #ecf0f1;
@@ -664,17 +3571,17 @@ class ModernMainWindow(QMainWindow):
             font-size: 12px;
         }
 
-        QListWidget::item {
+        QListView::item {
             padding: 10px;
             border-bottom: 1px solid #34495e;
             color: #ecf0f1;
         }
 
-        QListWidget::item:hover {
+        QListView::item:hover {
             background-color: #34495e;
         }
 
-        QListWidget::item:selected {
+        QListView::item:selected {
             background-color: #3498db;
             color: #ecf0f1;
         }
@@ -736,7 +3643,16 @@ class ModernMainWindow(QMainWindow):
 
         time_str = self.time_edit.time().toString("HH:mm")
 
-        self.task_data.add_task(content, selected_weekdays, time_str)
+        action_type = self.action_combo.currentData()
+        target = self.action_target_input.text().strip()
+        if action_type != ACTION_NONE and not target:
+            QMessageBox.warning(self, "警告", "请输入要执行的命令或 Webhook 地址！")
+            return
+        action = build_action(action_type, target)
+
+        task = self.task_data.add_task(content, selected_weekdays, time_str, action,
+                                       self.priority_combo.currentData(), self.ack_deadline_spin.value() or None)
+        self.tray_app.on_task_added(task)
         self.load_tasks()
         self.clear_inputs()
 
@@ -747,90 +3663,174 @@ class ModernMainWindow(QMainWindow):
         for checkbox in self.weekday_checkboxes:
             checkbox.setChecked(False)
         self.time_edit.setTime(QTime(9, 0))
+        self.action_combo.setCurrentIndex(0)
+        self.action_target_input.clear()
+        self.priority_combo.setCurrentIndex(self.priority_combo.findData(PRIORITY_NORMAL))
+        self.ack_deadline_spin.setValue(0)
+
+    def on_action_type_changed(self):
+        action_type = self.action_combo.currentData()
+        self.action_target_input.setEnabled(action_type != ACTION_NONE)
+        if action_type == ACTION_COMMAND:
+            self.action_target_input.setPlaceholderText("要执行的命令或脚本路径")
+        elif action_type == ACTION_WEBHOOK:
+            self.action_target_input.setPlaceholderText("http://127.0.0.1:8080/hook")
+        else:
+            self.action_target_input.setPlaceholderText("")
+            self.action_target_input.clear()
 
+    @profiled
     def load_tasks(self):
-        self.task_list.clear()
-        weekday_names = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
-
-        for task in self.task_data.tasks:
-            weekdays_str = ", ".join([weekday_names[w] for w in task['weekdays']])
-            status = "✅" if task['enabled'] else "❌"
-            item_text = f"{status} {task['content'][:30]}{'...' if len(task['content']) > 30 else ''} | {weekdays_str} | {task['time']}"
-
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.ItemDataRole.UserRole, task['id'])
-            self.task_list.addItem(item)
-
-    def remove_task(self, item):
-        task_id = item.data(Qt.ItemDataRole.UserRole)
+        self.task_model.reload()
+        # 重新计算当前筛选条件，新增任务也会按搜索词过滤
+        self.apply_filter()
+
+    def build_search_index_step(self):
+        if self.task_data.build_search_index_step():
+            self.index_timer.stop()
+            if self.refilter_when_indexed:
+                self.apply_filter()
+
+    def refresh_list_combo(self):
+        """ 下拉框只列出展开的清单 """
+        self.list_combo.blockSignals(True)
+        self.list_combo.clear()
+        current = 0
+        for name in self.tray_app.task_lists.visible_lists():
+            if self.tray_app.task_lists.shards[name] is self.task_data:
+                current = self.list_combo.count()
+            self.list_combo.addItem(name, name)
+        self.list_combo.setCurrentIndex(current)
+        self.list_combo.blockSignals(False)
+
+    def switch_list(self, _index=None):
+        name = self.list_combo.currentData()
+        shard = self.tray_app.task_lists.shards.get(name)
+        if shard is None or shard is self.task_data:
+            return
+        self.bind_task_data(shard)
+
+    def bind_task_data(self, task_data):
+        """ 切换当前显示的清单，模型改为引用新分片 """
+        self.task_data = task_data
+        self.tray_app.task_data = task_data
+        self.task_model.beginResetModel()
+        self.task_model.task_data = task_data
+        self.task_proxy.task_data = task_data
+        self.task_model.endResetModel()
+        self.load_tasks()
+        self.index_timer.start(0)
+
+    def manage_lists(self):
+        dialog = TaskListsDialog(self.tray_app.task_lists, self, is_dark_mode=self.is_dark_mode)
+        dialog.exec()
+        task_lists = self.tray_app.task_lists
+        for name, enabled, collapsed in dialog.changes:
+            loaded, unloaded = task_lists.set_list_state(name, enabled, collapsed)
+            self.tray_app.on_list_state_changed(loaded, unloaded)
+        for name in dialog.created:
+            self.tray_app.on_list_state_changed(task_lists.shards[name], [])
+        if self.task_data not in task_lists.shards.values():
+            self.bind_task_data(self.tray_app.first_visible_list())
+        self.refresh_list_combo()
+
+    def schedule_filter(self):
+        self.search_timer.start()
+
+    @profiled
+    def apply_filter(self):
+        self.search_timer.stop()
+        query = self.search_input.text()
+        match_ids, complete = self.task_data.search(query) if query.strip() else (None, True)
+        self.refilter_when_indexed = not complete
+        time_range = None
+        if self.time_filter_checkbox.isChecked():
+            time_range = (self.time_from_edit.time().toString("HH:mm"), self.time_to_edit.time().toString("HH:mm"))
+        self.task_proxy.set_filters(match_ids, self.weekday_filter.currentData(),
+                                    time_range, self.enabled_filter.currentData())
+        self.update_filter_count()
+
+    def update_filter_count(self):
+        text = f"显示 {self.task_proxy.rowCount()} / {len(self.task_data.tasks)} 个任务"
+        if self.refilter_when_indexed:
+            text += "（索引建立中）"
+        self.filter_count_label.setText(text)
+
+    def edit_task(self, index):
+        task_id = index.data(Qt.ItemDataRole.UserRole)
+        # 即将提醒视图中的任务可能属于其他清单
+        task = self.tray_app.task_lists.get_task(task_id)
+        if task is None:
+            return
+        dialog = TaskEditDialog(task, self.tray_app.task_lists.get_content(task), self, is_dark_mode=self.is_dark_mode)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.update_task(task_id, **dialog.get_fields())
+        elif dialog.delete_requested:
+            self.remove_task(index)
+
+    def update_task(self, task_id, **fields):
+        """ 修改任务后只刷新对应的行和调度状态 """
+        owner = self.tray_app.task_lists.owner_of(task_id) or self.task_data
+        changed = owner.update_task(task_id, **fields)
+        if not changed:
+            return
+        if owner is not self.task_data:
+            self.tray_app.on_task_changed(owner.get_task(task_id), changed)
+            return
+        if 'content' in changed and self.task_proxy.match_ids is not None:
+            # 搜索结果中只更新这一条任务的匹配状态
+            query = normalize_search_text(self.search_input.text())
+            if query in normalize_search_text(changed['content']):
+                self.task_proxy.match_ids.add(task_id)
+            else:
+                self.task_proxy.match_ids.discard(task_id)
+        self.task_model.refresh_task(task_id)
+        self.update_filter_count()
+        self.tray_app.on_task_changed(self.task_data.get_task(task_id), changed)
+
+    def show_task_menu(self, pos):
+        index = self.task_list.indexAt(pos)
+        if not index.isValid():
+            return
+        task = self.task_data.get_task(index.data(Qt.ItemDataRole.UserRole))
+        menu = QMenu(self)
+        edit_action = menu.addAction("✏️ 编辑")
+        toggle_action = menu.addAction("⏸ 停用" if task['enabled'] else "▶️ 启用")
+        delete_action = menu.addAction("🗑 删除")
+        chosen = menu.exec(self.task_list.viewport().mapToGlobal(pos))
+        if chosen == edit_action:
+            self.edit_task(index)
+        elif chosen == toggle_action:
+            self.update_task(task['id'], enabled=not task['enabled'])
+        elif chosen == delete_action:
+            self.remove_task(index)
+
+    def remove_task(self, index):
+        task_id = index.data(Qt.ItemDataRole.UserRole)
         reply = QMessageBox.question(self, "确认删除", "确定要删除这个任务吗？",
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            self.task_data.remove_task(task_id)
+            owner = self.tray_app.task_lists.owner_of(task_id) or self.task_data
+            owner.remove_task(task_id)
+            self.tray_app.on_task_removed(task_id)
             self.load_tasks()
 
-    def is_startup_enabled(self):
-        """检查是否已设置开机自启动"""
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                                 r"Software\Microsoft\Windows\CurrentVersion\Run",
-                                 0, winreg.KEY_READ)
-            winreg.QueryValueEx(key, APP_NAME)
-            winreg.CloseKey(key)
-            return True
-        except FileNotFoundError:
-            return False
-        except Exception:
-            return False
-
     def toggle_startup(self):
-        """切换开机自启动状态"""
-        if self.startup_checkbox.isChecked():
-            self.enable_startup()
+        """切换开机自启动状态，完成前禁用复选框"""
+        self.startup_checkbox.setEnabled(False)
+        self.tray_app.platform.set_startup(self.startup_checkbox.isChecked())
+
+    def on_startup_checked(self, enabled):
+        self.startup_checkbox.blockSignals(True)
+        self.startup_checkbox.setChecked(enabled)
+        self.startup_checkbox.blockSignals(False)
+
+    def on_startup_set(self, enabled, error):
+        self.startup_checkbox.setEnabled(True)
+        if error:
+            QMessageBox.warning(self, "设置失败", f"无法{'设置' if enabled else '取消'}开机自启动: {error}")
         else:
-            self.disable_startup()
-
-    def enable_startup(self):
-        """启用开机自启动"""
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                                 r"Software\Microsoft\Windows\CurrentVersion\Run",
-                                 0, winreg.KEY_SET_VALUE)
-            if getattr(sys, 'frozen', False):
-                app_path = sys.executable
-            else:
-                app_path = os.path.abspath(__file__)
-
-            if not getattr(sys, 'frozen', False):
-                bat_path = os.path.join(APP_DIR, f"{APP_NAME}.bat")
-                with open(bat_path, "w") as bat_file:
-                    bat_file.write(f'@echo off\n"{sys.executable}" "{app_path}"')
-                winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, f'"{bat_path}"')
-            else:
-                winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, f'"{app_path}"')
-            winreg.CloseKey(key)
-            QMessageBox.information(self, "设置成功", "开机自启动已启用！")
-        except Exception as e:
-            QMessageBox.warning(self, "设置失败", f"无法设置开机自启动: {e}")
-            self.startup_checkbox.setChecked(False)
-
-    def disable_startup(self):
-        """禁用开机自启动"""
-        try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                                 r"Software\Microsoft\Windows\CurrentVersion\Run",
-                                 0, winreg.KEY_SET_VALUE)
-            winreg.DeleteValue(key, APP_NAME)
-            winreg.CloseKey(key)
-            bat_path = os.path.join(APP_DIR, f"{APP_NAME}.bat")
-            if os.path.exists(bat_path):
-                os.remove(bat_path)
-            QMessageBox.information(self, "设置成功", "开机自启动已禁用！")
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            QMessageBox.warning(self, "设置失败", f"无法取消开机自启动: {e}")
-            self.startup_checkbox.setChecked(True)
+            QMessageBox.information(self, "设置成功", f"开机自启动已{'启用' if enabled else '禁用'}！")
 
     def closeEvent(self, event):
         self.hide()
@@ -839,10 +3839,14 @@ class ModernMainWindow(QMainWindow):
     def close_app(self):
         self.tray_app.quit_application()
         
+    def show_history(self):
+        dialog = HistoryDialog(self.tray_app.history, self.tray_app.task_lists, self, is_dark_mode=self.is_dark_mode)
+        dialog.exec()
+
     def show_test_notification(self):
         """显示测试通知"""
         # 创建一个测试任务
-        current_time = QTime.currentTime().toString("HH:mm")
+        current_time = self.tray_app.clock.now().strftime("%H:%M")
         test_task = {
             'id': 0,
             'content': "这是一条测试通知，用于验证通知功能是否正常工作。",
@@ -852,17 +3856,18 @@ class ModernMainWindow(QMainWindow):
             'last_triggered': None
         }
         
-        # 显示通知
-        self.tray_app.show_custom_notification(test_task)
+        # 显示通知，弹窗为非模态，需要保留引用
+        self.test_notification = self.tray_app.show_custom_notification(test_task)
         
         # 显示成功消息
         QMessageBox.information(self, "测试通知", f"测试通知已发送！\n时间: {current_time}\n请检查系统通知区域。")
 
 class SettingsDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, platform=None):
         super().__init__(parent)
         self.setWindowTitle("设置")
         self.settings = QSettings("MyCompany", APP_NAME)
+        self.platform = platform
         self.setup_ui()
         self.apply_theme()
 
@@ -876,6 +3881,48 @@ class SettingsDialog(QDialog):
         self.daily_popup_checkbox.setChecked(self.settings.value("daily_popup", True, type=bool))
         layout.addWidget(self.daily_popup_checkbox)
 
+        # 未确认时重复提醒
+        remind_layout = QHBoxLayout()
+        self.remind_until_ack_checkbox = QCheckBox("未确认时重复提醒，间隔(分钟):")
+        self.remind_until_ack_checkbox.setChecked(self.settings.value("remind_until_ack", False, type=bool))
+        remind_layout.addWidget(self.remind_until_ack_checkbox)
+        self.remind_interval_spin = QSpinBox()
+        self.remind_interval_spin.setRange(1, SNOOZE_MAX_MINUTES)
+        self.remind_interval_spin.setValue(self.settings.value("remind_interval", REMIND_INTERVAL_DEFAULT, type=int))
+        remind_layout.addWidget(self.remind_interval_spin)
+        layout.addLayout(remind_layout)
+
+        # 托盘消息频率限制
+        budget_layout = QHBoxLayout()
+        budget_layout.addWidget(QLabel("每分钟最多单独提醒条数(超出合并显示):"))
+        self.message_budget_spin = QSpinBox()
+        self.message_budget_spin.setRange(1, 60)
+        self.message_budget_spin.setValue(self.settings.value("message_budget", MESSAGE_BUDGET_DEFAULT, type=int))
+        budget_layout.addWidget(self.message_budget_spin)
+        layout.addLayout(budget_layout)
+
+        # 多进程分片求值
+        eval_layout = QHBoxLayout()
+        eval_layout.addWidget(QLabel("求值进程数(0 为关闭，重启后生效):"))
+        self.eval_workers_spin = QSpinBox()
+        self.eval_workers_spin.setRange(0, EVAL_MAX_WORKERS)
+        self.eval_workers_spin.setValue(self.settings.value("eval_workers", EVAL_WORKERS_DEFAULT, type=int))
+        eval_layout.addWidget(self.eval_workers_spin)
+        layout.addLayout(eval_layout)
+
+        # 订阅同步
+        sync_layout = QHBoxLayout()
+        sync_layout.addWidget(QLabel("订阅源:"))
+        self.sync_source_input = QLineEdit(self.settings.value("sync_source", "", type=str))
+        self.sync_source_input.setPlaceholderText("URL 或文件路径，留空则不同步")
+        sync_layout.addWidget(self.sync_source_input)
+        sync_layout.addWidget(QLabel("间隔(秒):"))
+        self.sync_interval_spin = QSpinBox()
+        self.sync_interval_spin.setRange(10, 24 * 3600)
+        self.sync_interval_spin.setValue(self.settings.value("sync_interval", SYNC_INTERVAL_DEFAULT, type=int))
+        sync_layout.addWidget(self.sync_interval_spin)
+        layout.addLayout(sync_layout)
+
         # 主题设置
         theme_layout = QHBoxLayout()
         theme_layout.addWidget(QLabel("应用主题:"))
@@ -899,6 +3946,12 @@ class SettingsDialog(QDialog):
 
     def save_settings(self):
         self.settings.setValue("daily_popup", self.daily_popup_checkbox.isChecked())
+        self.settings.setValue("remind_until_ack", self.remind_until_ack_checkbox.isChecked())
+        self.settings.setValue("remind_interval", self.remind_interval_spin.value())
+        self.settings.setValue("message_budget", self.message_budget_spin.value())
+        self.settings.setValue("eval_workers", self.eval_workers_spin.value())
+        self.settings.setValue("sync_source", self.sync_source_input.text().strip())
+        self.settings.setValue("sync_interval", self.sync_interval_spin.value())
         self.settings.setValue("theme", self.theme_combo.currentData())
         QMessageBox.information(self, "设置已保存", "设置已成功保存！需要重启应用以应用主题更改。")
         self.accept()
@@ -908,11 +3961,13 @@ class SettingsDialog(QDialog):
         is_dark = False
         
         if theme == THEME_SYSTEM:
-            is_dark = is_windows_dark_mode()
+            is_dark = self.platform.dark_mode if self.platform is not None else False
         elif theme == THEME_DARK:
             is_dark = True
             
-        if is_dark:
+        if not is_dark:
+            self.setStyleSheet("")
+        else:
             self.setStyleSheet("""
                 QDialog {
                     background-color: #1e272e;
@@ -943,22 +3998,456 @@ class SettingsDialog(QDialog):
                 }
             """)
 
+class TaskListsDialog(QDialog):
+    """ 清单管理：新建清单，设置启用和收起状态 """
+    def __init__(self, task_lists, parent=None, is_dark_mode=False):
+        super().__init__(parent)
+        self.task_lists = task_lists
+        self.changes = []
+        self.created = []
+        self.setWindowTitle("管理任务清单")
+        self.setMinimumSize(420, 320)
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["清单", "启用", "收起"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+        for entry in task_lists.lists:
+            self.add_row(entry)
+
+        btn_layout = QHBoxLayout()
+        new_btn = QPushButton("➕ 新建清单")
+        new_btn.clicked.connect(self.create_list)
+        btn_layout.addWidget(new_btn)
+        btn_layout.addStretch()
+        ok_btn = QPushButton("确定")
+        ok_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(ok_btn)
+        cancel_btn = QPushButton("取消")
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+        layout.addLayout(btn_layout)
+
+        if is_dark_mode:
+            self.setStyleSheet("QDialog { background-color: #2b2b2b; color: #ffffff; } QTableWidget { background-color: #3c3c3c; color: #ffffff; }")
+
+    def add_row(self, entry):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        name_item = QTableWidgetItem(entry['name'])
+        name_item.setFlags(name_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+        self.table.setItem(row, 0, name_item)
+        for column, checked in ((1, entry.get('enabled', True)), (2, entry.get('collapsed', False))):
+            item = QTableWidgetItem()
+            item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
+            item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+            self.table.setItem(row, column, item)
+
+    def create_list(self):
+        name, ok = QInputDialog.getText(self, "新建清单", "清单名称:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        try:
+            self.task_lists.create_list(name)
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", str(e))
+            return
+        self.created.append(name)
+        self.add_row(self.task_lists.get_entry(name))
+
+    def accept(self):
+        for row in range(self.table.rowCount()):
+            name = self.table.item(row, 0).text()
+            entry = self.task_lists.get_entry(name)
+            enabled = self.table.item(row, 1).checkState() == Qt.CheckState.Checked
+            collapsed = self.table.item(row, 2).checkState() == Qt.CheckState.Checked
+            if enabled != entry.get('enabled', True) or collapsed != entry.get('collapsed', False):
+                self.changes.append((name, enabled, collapsed))
+        super().accept()
+
+class HistoryDialog(QDialog):
+    """ 分页浏览触发历史，每页只读取当前页的记录 """
+    def __init__(self, history, task_data, parent=None, is_dark_mode=False):
+        super().__init__(parent)
+        self.history = history
+        self.task_data = task_data
+        self.is_dark_mode = is_dark_mode
+        self.page = 0
+        self.total = 0
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        self.setWindowTitle("📜 触发历史")
+        self.resize(720, 520)
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        # 筛选条件
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("任务:"))
+        self.task_combo = QComboBox()
+        self.task_combo.addItem("全部任务", None)
+        for task in self.task_data.iter_tasks():
+            self.task_combo.addItem(f"#{task['id']} {task['preview']}", task['id'])
+        self.task_combo.currentIndexChanged.connect(self.reset_and_refresh)
+        filter_layout.addWidget(self.task_combo)
+
+        filter_layout.addWidget(QLabel("从:"))
+        self.start_date = QDateEdit(QDate.currentDate().addDays(-7))
+        self.start_date.setCalendarPopup(True)
+        self.start_date.dateChanged.connect(self.reset_and_refresh)
+        filter_layout.addWidget(self.start_date)
+        filter_layout.addWidget(QLabel("到:"))
+        self.end_date = QDateEdit(QDate.currentDate())
+        self.end_date.setCalendarPopup(True)
+        self.end_date.dateChanged.connect(self.reset_and_refresh)
+        filter_layout.addWidget(self.end_date)
+        layout.addLayout(filter_layout)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["任务", "计划时间", "实际时间", "确认时间", "结果"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        # 翻页
+        page_layout = QHBoxLayout()
+        self.prev_btn = QPushButton("上一页")
+        self.prev_btn.clicked.connect(lambda: self.go_page(-1))
+        page_layout.addWidget(self.prev_btn)
+        self.page_label = QLabel()
+        page_layout.addWidget(self.page_label)
+        self.next_btn = QPushButton("下一页")
+        self.next_btn.clicked.connect(lambda: self.go_page(1))
+        page_layout.addWidget(self.next_btn)
+        page_layout.addStretch()
+        layout.addLayout(page_layout)
+
+        if self.is_dark_mode:
+            self.setStyleSheet("""
+                QDialog, QTableWidget {
+                    background-color: #1e272e;
+                    color: #ecf0f1;
+                }
+                QLabel {
+                    color: #ecf0f1;
+                }
+                QPushButton {
+                    background-color: #3498db;
+                    color: #ecf0f1;
+                    border: none;
+                    border-radius: 5px;
+                    padding: 6px 16px;
+                }
+            """)
+
+    def reset_and_refresh(self):
+        self.page = 0
+        self.refresh()
+
+    def go_page(self, delta):
+        self.page += delta
+        self.refresh()
+
+    def refresh(self):
+        task_id = self.task_combo.currentData()
+        offset = self.page * HISTORY_PAGE_SIZE
+        if task_id is None:
+            start = datetime.datetime.combine(self.start_date.date().toPyDate(), datetime.time.min)
+            end = datetime.datetime.combine(self.end_date.date().toPyDate(), datetime.time.min) + datetime.timedelta(days=1)
+            self.total = self.history.count_range(start, end)
+            records = self.history.query_range(start, end, offset, HISTORY_PAGE_SIZE)
+        else:
+            self.total = self.history.count_task(task_id)
+            records = self.history.last_firings(task_id, HISTORY_PAGE_SIZE, offset)
+
+        previews = {t['id']: t['preview'] for t in self.task_data.iter_tasks()}
+        self.table.setRowCount(len(records))
+        for row, record in enumerate(records):
+            values = [
+                f"#{record['task_id']} {previews.get(record['task_id'], '(已删除)')}",
+                record['scheduled'].strftime("%Y-%m-%d %H:%M") if record['scheduled'] else "",
+                record['actual'].strftime("%Y-%m-%d %H:%M:%S") if record['actual'] else "",
+                record['acknowledged'].strftime("%Y-%m-%d %H:%M:%S") if record['acknowledged'] else "",
+                HISTORY_OUTCOME_NAMES.get(record['outcome'], str(record['outcome'])),
+            ]
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+
+        pages = max(1, (self.total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE)
+        self.page_label.setText(f"第 {self.page + 1} / {pages} 页，共 {self.total} 条")
+        self.prev_btn.setEnabled(self.page > 0)
+        self.next_btn.setEnabled(self.page + 1 < pages)
+
+class WindowsIntegration:
+    """ Windows：注册表 Run 项实现开机自启动，注册表读取系统主题 """
+    RUN_KEY = r"Software\Microsoft\Windows\CurrentVersion\Run"
+
+    def is_startup_enabled(self):
+        try:
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.RUN_KEY, 0, winreg.KEY_READ)
+            winreg.QueryValueEx(key, APP_NAME)
+            winreg.CloseKey(key)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def set_startup(self, enabled):
+        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.RUN_KEY, 0, winreg.KEY_SET_VALUE)
+        bat_path = os.path.join(APP_DIR, f"{APP_NAME}.bat")
+        try:
+            if enabled:
+                if getattr(sys, 'frozen', False):
+                    winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, f'"{sys.executable}"')
+                else:
+                    # 以脚本形式运行时通过 .bat 启动解释器
+                    with open(bat_path, "w") as bat_file:
+                        bat_file.write(f'@echo off\n"{sys.executable}" "{os.path.abspath(__file__)}"')
+                    winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, f'"{bat_path}"')
+            else:
+                try:
+                    winreg.DeleteValue(key, APP_NAME)
+                except FileNotFoundError:
+                    pass
+                if os.path.exists(bat_path):
+                    os.remove(bat_path)
+        finally:
+            winreg.CloseKey(key)
+
+    def detect_dark_mode(self):
+        return is_windows_dark_mode()
+
+class XdgIntegration:
+    """ Linux 桌面：~/.config/autostart 下的 .desktop 文件实现开机自启动，gsettings 读取系统主题 """
+    def autostart_path(self):
+        config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+        return os.path.join(config_home, "autostart", f"{APP_NAME}.desktop")
+
+    def is_startup_enabled(self):
+        path = self.autostart_path()
+        if not os.path.exists(path):
+            return False
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = dict(line.strip().split('=', 1) for line in f if '=' in line)
+        return entries.get('Hidden', 'false') != 'true' and entries.get('X-GNOME-Autostart-enabled', 'true') != 'false'
+
+    def set_startup(self, enabled):
+        path = self.autostart_path()
+        if not enabled:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        if getattr(sys, 'frozen', False):
+            command = f'"{sys.executable}"'
+        else:
+            command = f'"{sys.executable}" "{os.path.abspath(__file__)}"'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("[Desktop Entry]\n"
+                    "Type=Application\n"
+                    f"Name={APP_NAME}\n"
+                    f"Exec={command}\n"
+                    "X-GNOME-Autostart-enabled=true\n")
+        os.replace(tmp_path, path)
+
+    def detect_dark_mode(self):
+        # 较新的 GNOME 使用 color-scheme，旧版本只能从 GTK 主题名判断
+        for key, dark_marker in (("color-scheme", "prefer-dark"), ("gtk-theme", "dark")):
+            try:
+                result = subprocess.run(["gsettings", "get", "org.gnome.desktop.interface", key],
+                                        capture_output=True, text=True, timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                return False
+            if result.returncode == 0 and dark_marker in result.stdout.lower():
+                return True
+        return False
+
+class UnsupportedIntegration:
+    """ 其他平台：不支持开机自启动，主题按浅色处理 """
+    def is_startup_enabled(self):
+        return False
+
+    def set_startup(self, enabled):
+        raise OSError("当前系统不支持开机自启动设置")
+
+    def detect_dark_mode(self):
+        return False
+
+def platform_backend():
+    if sys.platform == "win32" and winreg is not None:
+        return WindowsIntegration()
+    if sys.platform.startswith("linux"):
+        return XdgIntegration()
+    return UnsupportedIntegration()
+
+class PlatformIntegration(QObject):
+    """ 开机自启动和系统主题检测服务
+
+    注册表、文件和外部命令都在后台线程中执行，结果通过信号送回界面线程。
+    上次的结果保存在 QSettings 中，界面构造时直接使用缓存值，不等待系统调用。
+    """
+    startup_checked = pyqtSignal(bool)
+    # (请求的状态, 错误信息)，成功时错误信息为空
+    startup_set = pyqtSignal(bool, str)
+    dark_mode_detected = pyqtSignal(bool)
+
+    def __init__(self, settings, backend=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.backend = backend or platform_backend()
+        self.startup_enabled = settings.value("cached_startup_enabled", False, type=bool)
+        self.dark_mode = settings.value("cached_dark_mode", False, type=bool)
+        # 单线程执行，保证自启动的查询和修改按提交顺序进行
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="platform")
+        self.startup_checked.connect(self.cache_startup)
+        self.dark_mode_detected.connect(self.cache_dark_mode)
+
+    def refresh(self):
+        self.executor.submit(self._refresh)
+
+    def set_startup(self, enabled):
+        self.executor.submit(self._set_startup, enabled)
+
+    def _refresh(self):
+        try:
+            self.startup_checked.emit(self.backend.is_startup_enabled())
+        except Exception as e:
+            print(f"检查开机自启动失败: {e}")
+        try:
+            self.dark_mode_detected.emit(self.backend.detect_dark_mode())
+        except Exception as e:
+            print(f"检测系统主题失败: {e}")
+
+    def _set_startup(self, enabled):
+        try:
+            self.backend.set_startup(enabled)
+            error = ""
+        except Exception as e:
+            error = str(e)
+        self.startup_set.emit(enabled, error)
+        try:
+            self.startup_checked.emit(self.backend.is_startup_enabled())
+        except Exception as e:
+            print(f"检查开机自启动失败: {e}")
+
+    def cache_startup(self, enabled):
+        self.startup_enabled = enabled
+        self.settings.setValue("cached_startup_enabled", enabled)
+
+    def cache_dark_mode(self, dark_mode):
+        self.dark_mode = dark_mode
+        self.settings.setValue("cached_dark_mode", dark_mode)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class InstanceServer(QObject):
+    """ 单实例服务端：接收后续启动的实例发来的一行命令，先回复确认再处理
+
+    连接的读写都由事件循环驱动，不会阻塞界面线程；迟迟不发命令的连接超时后断开。
+    """
+    command_received = pyqtSignal(str)
+
+    def __init__(self, name=None, timeout_ms=SINGLE_INSTANCE_TIMEOUT_MS, parent=None):
+        super().__init__(parent)
+        self.name = name or single_instance_name()
+        self.timeout_ms = timeout_ms
+        self.server = QLocalServer(self)
+        # 只允许当前用户连接
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.accept_connections)
+        self.lock = None
+
+    def listen(self):
+        """ 开始监听，端点已被其他正在运行的实例占用时返回 False
+
+        带访问限制的 listen 会直接替换已有的套接字文件，所以先用锁文件决定谁拥有端点；
+        持有锁的进程已退出时锁会被当作失效而自动接管。
+        """
+        self.lock = QLockFile(os.path.join(tempfile.gettempdir(), f"{self.name}.lock"))
+        self.lock.setStaleLockTime(0)
+        if not self.lock.tryLock(0):
+            return False
+        # 上次异常退出可能留下失效的套接字文件
+        QLocalServer.removeServer(self.name)
+        return self.server.listen(self.name)
+
+    def accept_connections(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            connection.readyRead.connect(lambda connection=connection: self.read_command(connection))
+            connection.disconnected.connect(connection.deleteLater)
+            timeout = QTimer(connection)
+            timeout.setSingleShot(True)
+            timeout.timeout.connect(connection.abort)
+            timeout.start(self.timeout_ms)
+
+    def read_command(self, connection):
+        if not connection.canReadLine():
+            return
+        command = bytes(connection.readLine()).decode('utf-8', errors='replace').strip()
+        connection.write(b"OK\n")
+        connection.flush()
+        connection.disconnectFromServer()
+        self.command_received.emit(command)
+
+    def close(self):
+        self.server.close()
+        if self.lock is not None:
+            self.lock.unlock()
+
 class TrayApplication(QApplication):
-    def __init__(self, *args, socket=None, **kwargs):  # 添加 socket 关键字参数
+    def __init__(self, *args, clock=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.setQuitOnLastWindowClosed(False)
-        
+        # 调度器所有读取时间的地方都通过 clock，便于回放和测试
+        self.clock = clock or SystemClock()
+        # 单实例服务端，由 start_instance_server 开始监听
+        self.instance_server = None
+
+    def setup(self):
+        """ 加载任务并启动定时器、后台线程和求值进程
+
+        在拿到单实例端点之后才调用，避免抢输的实例已经弹出提醒或写回任务数据。
+        """
         self.settings = QSettings("MyCompany", APP_NAME)
-        self.task_data = TaskData()
+        self.task_lists = TaskListManager()
+        # 主窗口当前显示的清单
+        self.task_data = self.task_lists.shards.get(DEFAULT_LIST_NAME) or self.first_visible_list()
+        self.history = HistoryStore(HISTORY_DIR, clock=self.clock)
+        # 稍后提醒/重复提醒统一挂在时间轮上，由一个秒级定时器推进
+        self.reminder_wheel = TimingWheel(start=self.clock.now().timestamp())
+        self.reminder_timer = QTimer(self)
+        self.reminder_timer.timeout.connect(self.process_reminders)
+        self.reminder_timer.start(1000)
+        self.message_limiter = MessageRateLimiter(self.settings.value("message_budget", MESSAGE_BUDGET_DEFAULT, type=int))
+        self.pending_digest = None
+        # 弹窗提醒按优先级排队，同一时间只显示一个
+        self.notification_queue = NotificationQueue()
+        self.active_item = None
+        self.active_notification = None
+        self.action_runner = ActionRunner(parent=self)
+        self.action_runner.action_finished.connect(self.on_action_finished)
+        self.upcoming_model = UpcomingModel(self.task_lists, self)
+        self.upcoming_model.rebuild(self.clock.now())
+        # 可选的多进程分片求值，界面进程只负责分发提醒
+        self.evaluator = None
+        self.evaluator_restarts = 0
+        self.start_evaluator()
+        # 自启动和系统主题由后台服务检测，界面先使用缓存的结果
+        self.platform = PlatformIntegration(self.settings, parent=self)
         self.main_window = ModernMainWindow(self)
-        self.settings_dialog = SettingsDialog()
-        self.last_check_time = datetime.datetime.now().replace(second=0, microsecond=0)
-
-        # 单实例套接字服务器
-        self.server_socket = socket  # 使用传入的 socket 参数
-        if self.server_socket:
-            self.socket_notifier = QSocketNotifier(self.server_socket.fileno(), QSocketNotifier.Type.Read, self)
-            self.socket_notifier.activated.connect(self.handle_socket_connection)
+        self.settings_dialog = SettingsDialog(platform=self.platform)
+        self.feed_sync = None
+        self.configure_sync()
+        self.last_check_time = self.clock.now().replace(second=0, microsecond=0)
 
         # 创建托盘图标
         self.tray_icon = QSystemTrayIcon(self)
@@ -981,6 +4470,17 @@ class TrayApplication(QApplication):
         settings_action = QAction("设置", self)
         settings_action.triggered.connect(self.show_settings_dialog)
         self.tray_menu.addAction(settings_action)
+
+        self.profile_action = QAction("开始性能分析", self)
+        self.profile_action.triggered.connect(self.toggle_profiling)
+        self.tray_menu.addAction(self.profile_action)
+        self.profile_timer = QTimer(self)
+        self.profile_timer.setSingleShot(True)
+        self.profile_timer.timeout.connect(self.stop_profiling)
+
+        sync_action = QAction("立即同步订阅", self)
+        sync_action.triggered.connect(self.sync_now)
+        self.tray_menu.addAction(sync_action)
         
         self.tray_menu.addSeparator()
         
@@ -988,15 +4488,33 @@ class TrayApplication(QApplication):
         exit_action.triggered.connect(self.quit_application)
         self.tray_menu.addAction(exit_action)
 
-        # 应用主题到托盘菜单
-        theme = self.settings.value("theme", THEME_SYSTEM, type=str)
-        is_dark = False
-        if theme == THEME_SYSTEM:
-            is_dark = is_windows_dark_mode()
-        elif theme == THEME_DARK:
-            is_dark = True
-            
-        if is_dark:
+        self.apply_menu_theme()
+
+        self.tray_icon.setContextMenu(self.tray_menu)
+        self.tray_icon.activated.connect(self.on_tray_icon_activated)
+        self.tray_icon.messageClicked.connect(self.on_tray_message_clicked)
+        self.update_tray_tooltip()
+
+        # 主线程卡顿监控
+        self.watchdog = MainThreadWatchdog(parent=self)
+        self.watchdog.start()
+
+        self.platform.dark_mode_detected.connect(self.on_dark_mode_detected)
+        self.platform.refresh()
+
+        # 定时器检查时间
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check_time_and_notify)
+        self.timer.start(10000)
+        
+        print(f"应用程序启动。加载了 {len(self.task_lists.shards)} 个清单，{self.task_lists.task_count()} 个任务。")
+        self.check_time_and_notify()
+
+    def apply_menu_theme(self):
+        """ 应用主题到托盘菜单 """
+        if not self.is_dark_theme():
+            self.tray_menu.setStyleSheet("")
+        else:
             self.tray_menu.setStyleSheet("""
                 QMenu {
                     background-color: #2c3e50;
@@ -1011,16 +4529,15 @@ class TrayApplication(QApplication):
                 }
             """)
 
-        self.tray_icon.setContextMenu(self.tray_menu)
-        self.tray_icon.activated.connect(self.on_tray_icon_activated)
-
-        # 定时器检查时间
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.check_time_and_notify)
-        self.timer.start(10000)
-        
-        print(f"应用程序启动。加载了 {len(self.task_data.tasks)} 个任务。")
-        self.check_time_and_notify()
+    def on_dark_mode_detected(self, dark_mode):
+        """ 系统主题与缓存不同时，跟随系统的界面重新应用主题 """
+        if self.settings.value("theme", THEME_SYSTEM, type=str) != THEME_SYSTEM:
+            return
+        if self.main_window.is_dark_mode == dark_mode:
+            return
+        self.main_window.apply_theme()
+        self.settings_dialog.apply_theme()
+        self.apply_menu_theme()
 
     def create_icon(self):
         if os.path.exists(ICON_PATH):
@@ -1047,78 +4564,538 @@ class TrayApplication(QApplication):
 
     def show_settings_dialog(self):
         self.settings_dialog.exec()
-
+        self.configure_sync()
+
+    def configure_sync(self):
+        """ 按设置启动订阅同步，订阅源或间隔变化时重新开始 """
+        source = self.settings.value("sync_source", "", type=str).strip()
+        interval = self.settings.value("sync_interval", SYNC_INTERVAL_DEFAULT, type=int)
+        if self.feed_sync is not None:
+            if self.feed_sync.fetcher.source == source and self.feed_sync.interval == interval:
+                return
+            self.feed_sync.stop()
+            self.feed_sync = None
+        if not source:
+            return
+        self.feed_sync = FeedSync(source, interval, parent=self)
+        self.feed_sync.feed_received.connect(self.on_feed_received)
+        self.feed_sync.sync_failed.connect(self.on_sync_failed)
+        self.feed_sync.start()
+
+    def sync_now(self):
+        if self.feed_sync is not None:
+            self.feed_sync.sync_now()
+
+    def on_feed_received(self, feed_tasks):
+        result, unloaded = self.task_lists.merge_feed(SYNC_LIST_NAME, feed_tasks)
+        print(f"订阅同步: 新增 {len(result['added'])}，修改 {len(result['updated'])}，删除 {len(result['removed'])}")
+        if not any(result.values()):
+            return
+        for task_id in result['removed'] + unloaded:
+            self.reminder_wheel.cancel(task_id)
+        merged = (self.task_lists.get_task(task_id) for task_id in result['added'] + result['updated'])
+        merged = [task for task in merged if task is not None]
+        self.sync_evaluator(merged, result['removed'] + unloaded)
+        self.update_upcoming(merged, result['removed'] + unloaded)
+        self.main_window.refresh_list_combo()
+        if self.main_window.task_data is self.task_lists.shards.get(SYNC_LIST_NAME):
+            self.main_window.load_tasks()
+
+    def on_sync_failed(self, message):
+        print(f"订阅同步失败: {message}")
+
+    @profiled
     def check_time_and_notify(self):
-        current_datetime = datetime.datetime.now().replace(second=0, microsecond=0)
-        current_weekday = current_datetime.weekday()
+        current_datetime = self.clock.now().replace(second=0, microsecond=0)
         current_time_str = current_datetime.strftime("%H:%M")
         
         if current_datetime <= self.last_check_time:
             return
         
         self.last_check_time = current_datetime
-        
-        for task in self.task_data.get_active_tasks():
-            if (current_weekday in task['weekdays'] and 
-                task['time'] == current_time_str):
-                
-                last_triggered = task.get('last_triggered')
-                today_str = current_datetime.date().isoformat()
-                
-                if last_triggered != today_str:
-                    self.show_custom_notification(task)
-                    task['last_triggered'] = today_str
-                    self.task_data.save_data()
-
-    def show_custom_notification(self, task):
+
+        due = []
+        for task in self.task_lists.collect_due(current_datetime, self.evaluator):
+            handle = self.history.record_firing(task['id'], current_datetime, self.clock.now())
+            # 动作先提交到线程池，避免被模态弹窗阻塞
+            self.action_runner.submit(task, self.task_lists.get_content(task))
+            # 新一轮提醒取代该任务尚未完成的稍后提醒
+            self.reminder_wheel.cancel(task['id'])
+            due.append((task, handle))
+        if self.evaluator is not None and self.evaluator.broken:
+            self.restart_evaluator()
+
+        if due:
+            self.task_lists.save_changes({task['id']: {'last_triggered': task['last_triggered']} for task, _ in due})
+        # 被唤醒的收起清单保存触发记录后立即重新收起，它们的任务不进入即将提醒视图
+        collapsed = set(self.task_lists.collapse_woken([task for task, _ in due]))
+        if collapsed:
+            self.sync_evaluator(removed=list(collapsed))
+        for task, _ in due:
+            if task['id'] not in collapsed:
+                self.upcoming_model.update_task(task, current_datetime)
+        self.upcoming_model.refresh_stale(current_datetime)
+        self.update_tray_tooltip()
+
+        if due:
+            self.dispatch_notifications(due, current_time_str)
+
+    def start_evaluator(self):
+        eval_workers = self.settings.value("eval_workers", EVAL_WORKERS_DEFAULT, type=int)
+        if eval_workers <= 0:
+            return
+        self.evaluator = ShardedEvaluator(min(eval_workers, EVAL_MAX_WORKERS))
+        try:
+            self.evaluator.load(self.task_lists.iter_tasks())
+        except EvaluatorError as e:
+            print(f"启动求值进程失败: {e}")
+
+    def sync_evaluator(self, upserted=(), removed=()):
+        """ 把任务增删改同步给求值进程，通信失败时重建 """
+        if self.evaluator is None:
+            return
+        try:
+            if removed:
+                self.evaluator.remove(removed)
+            if upserted:
+                self.evaluator.upsert(upserted)
+        except EvaluatorError as e:
+            print(f"同步求值进程失败: {e}")
+            self.restart_evaluator()
+
+    def restart_evaluator(self):
+        """ 工作进程崩溃或超时后整体重建，多次失败后改为进程内求值 """
+        self.evaluator.close()
+        self.evaluator = None
+        if self.evaluator_restarts >= EVAL_MAX_RESTARTS:
+            print("求值进程多次失效，之后在界面进程内求值")
+            return
+        self.evaluator_restarts += 1
+        print(f"重启求值进程（第 {self.evaluator_restarts} 次）")
+        self.start_evaluator()
+
+    def update_tray_tooltip(self):
+        upcoming = self.upcoming_model.peek()
+        if upcoming is None or upcoming[1] is None:
+            self.tray_icon.setToolTip(f"{APP_NAME}\n暂无即将到来的提醒")
+            return
+        when, task = upcoming
+        self.tray_icon.setToolTip(f"下一个提醒: {when:%m-%d} {WEEKDAY_NAMES[when.weekday()]} {when:%H:%M}\n{task['preview']}")
+
+    def dispatch_notifications(self, due, label):
+        """ 高优先级提醒不受频率限制；其余预算内逐条提醒，同一批超出预算时合并成一条汇总提醒 """
+        self.message_limiter.budget = self.settings.value("message_budget", MESSAGE_BUDGET_DEFAULT, type=int)
+        now = self.clock.now()
+        urgent = [(task, handle) for task, handle in due if task.get('priority', PRIORITY_NORMAL) >= PRIORITY_HIGH]
+        regular = [(task, handle) for task, handle in due if task.get('priority', PRIORITY_NORMAL) < PRIORITY_HIGH]
+        items = [PendingNotification([entry], label, now) for entry in urgent]
+        if regular:
+            if self.message_limiter.acquire(now.timestamp(), len(regular)):
+                items.extend(PendingNotification([entry], label, now) for entry in regular)
+            else:
+                # 汇总消息本身也占用一条预算，但无论预算是否耗尽都会发出，保证提醒不丢失
+                self.message_limiter.acquire(now.timestamp())
+                items.append(PendingNotification(regular, label, now, digest=True))
+        for item in items:
+            self.notification_queue.push(item)
+        self.pump_notifications()
+
+    def pump_notifications(self):
+        """ 显示队首的提醒；队首优先级高于正在显示的弹窗时抢占它 """
+        if not self.settings.value("daily_popup", True, type=bool):
+            # 不弹窗时只发托盘消息，按优先级顺序发出；用户主动查看的汇总仍然弹窗
+            view_only = []
+            while self.notification_queue:
+                item = self.notification_queue.pop()
+                if item.view_only:
+                    view_only.append(item)
+                else:
+                    self.show_item(item)
+            for item in view_only:
+                self.notification_queue.push(item)
+        head = self.notification_queue.peek()
+        if head is None:
+            return
+        if self.active_item is not None:
+            if head.priority <= self.active_item.priority:
+                return
+            self.preempt_active()
+        item = self.notification_queue.pop()
+        notification = self.show_item(item)
+        if notification is None:
+            self.pump_notifications()
+            return
+        self.active_item = item
+        self.active_notification = notification
+        notification.finished.connect(lambda _, item=item, notification=notification: self.on_notification_finished(item, notification))
+
+    def preempt_active(self):
+        """ 关闭正在显示的弹窗但不记录结果，提醒放回队列稍后重新显示 """
+        item, notification = self.active_item, self.active_notification
+        self.active_item = None
+        self.active_notification = None
+        notification.close()
+        notification.deleteLater()
+        self.notification_queue.push(item)
+
+    def show_item(self, item):
+        if item.view_only:
+            entries = [(task, self.task_lists.get_content(task)) for task, _ in item.entries]
+            notification = DigestNotification(entries, item.label, is_dark_mode=self.is_dark_theme())
+            notification.show()
+            return notification
+        if item.digest:
+            return self.show_digest_notification(item.entries, item.label)
+        return self.show_custom_notification(item.entries[0][0], item.deadline)
+
+    def on_notification_finished(self, item, notification):
+        if notification is not self.active_notification:
+            # 被抢占的弹窗关闭时不处理结果
+            return
+        self.active_item = None
+        self.active_notification = None
+        notification.deleteLater()
+        if not item.view_only:
+            for task, handle in item.entries:
+                self.handle_notification_result(task, handle, notification)
+        self.pump_notifications()
+
+    def check_ack_deadlines(self, now):
+        """ 超过确认期限仍未确认的提醒提升优先级，必要时抢占当前弹窗 """
+        overdue = [item for item in list(self.notification_queue) + [self.active_item]
+                   if item is not None and item.deadline and not item.overdue and item.deadline <= now]
+        if not overdue:
+            return
+        for item in overdue:
+            item.overdue = True
+            item.priority = PRIORITY_OVERDUE
+            tasks = "、".join(task['preview'] for task, _ in item.entries)
+            self.tray_icon.showMessage("⚠️ 提醒已超过确认期限", tasks, QSystemTrayIcon.MessageIcon.Warning, 8000)
+        if self.active_item in overdue:
+            self.active_notification.raise_()
+            self.active_notification.activateWindow()
+        self.notification_queue.reorder()
+        self.pump_notifications()
+
+    def handle_notification_result(self, task, handle, notification):
+        """ 根据弹窗结果记录历史，并安排稍后提醒或重复提醒 """
+        if notification is None:
+            return
+        now = self.clock.now()
+        if notification.snooze_minutes:
+            self.history.mark(handle, HISTORY_SNOOZED)
+            self.schedule_reminder(task, now + datetime.timedelta(minutes=notification.snooze_minutes))
+        elif notification.result() == QDialog.DialogCode.Accepted:
+            self.history.mark(handle, HISTORY_ACKNOWLEDGED, now)
+        else:
+            self.history.mark(handle, HISTORY_DISMISSED)
+            if self.settings.value("remind_until_ack", False, type=bool):
+                interval = self.settings.value("remind_interval", REMIND_INTERVAL_DEFAULT, type=int)
+                self.schedule_reminder(task, now + datetime.timedelta(minutes=interval))
+
+    def schedule_reminder(self, task, when):
+        self.reminder_wheel.add(task['id'], when.timestamp(), (task, when.replace(second=0, microsecond=0)))
+
+    @profiled
+    def process_reminders(self):
+        now = self.clock.now()
+        due = []
+        for _, (task, scheduled) in self.reminder_wheel.advance(now.timestamp()):
+            due.append((task, self.history.record_firing(task['id'], scheduled, now)))
+        if due:
+            self.dispatch_notifications(due, now.strftime("%H:%M"))
+        self.check_ack_deadlines(now)
+
+    def is_dark_theme(self):
+        theme = self.settings.value("theme", THEME_SYSTEM, type=str)
+        if theme == THEME_SYSTEM:
+            return self.platform.dark_mode
+        return theme == THEME_DARK
+
+    def show_digest_notification(self, due, label):
+        """ 发出汇总托盘消息，启用弹窗时显示非模态的汇总弹窗并返回 """
+        entries = [(task, self.task_lists.get_content(task)) for task, _ in due]
+        self.pending_digest = (due, label)
+        title = "📅 定期提醒汇总"
+        message = f"⏰ {len(entries)} 条提醒在 {label} 到期，点击查看全部"
+        self.tray_icon.showMessage(title, message, QSystemTrayIcon.MessageIcon.Information, 8000)
+
+        if self.settings.value("daily_popup", True, type=bool):
+            notification = DigestNotification(entries, label, is_dark_mode=self.is_dark_theme())
+            notification.show()
+            return notification
+        return None
+
+    def on_tray_message_clicked(self):
+        # 点击汇总消息时打开合并视图（仅查看，不改变提醒状态），和其他弹窗一样排队
+        if self.pending_digest:
+            due, label = self.pending_digest
+            self.pending_digest = None
+            self.notification_queue.push(PendingNotification(due, label, self.clock.now(), digest=True, view_only=True))
+            self.pump_notifications()
+
+    def show_custom_notification(self, task, deadline=None):
+        """ 发出托盘消息，启用弹窗时显示非模态弹窗并返回 """
         # 托盘通知
         title = "📅 定期提醒"
-        message = f"⏰ {task['time']}\n\n{task['content']}"
+        content = self.task_lists.get_content(task)
+        message = f"⏰ {task['time']}\n\n{content}"
         self.tray_icon.showMessage(title, message, QSystemTrayIcon.MessageIcon.Information, 8000)
         
+        self.pending_digest = None
+
         # 弹窗通知（如果启用）
         if self.settings.value("daily_popup", True, type=bool):
-            # 检查是否为暗黑模式
-            theme = self.settings.value("theme", THEME_SYSTEM, type=str)
-            is_dark = False
-            if theme == THEME_SYSTEM:
-                is_dark = is_windows_dark_mode()
-            elif theme == THEME_DARK:
-                is_dark = True
-                
-            notification = CustomNotification(task, is_dark_mode=is_dark)
-            notification.exec()
+            notification = CustomNotification(task, content, is_dark_mode=self.is_dark_theme(), deadline=deadline)
+            notification.show()
+            return notification
+        return None
+
+    def on_task_changed(self, task, changed):
+        """ 任务被编辑后同步调度状态 """
+        if not task['enabled'] or 'time' in changed or 'weekdays' in changed:
+            # 停用或改期后，之前安排的稍后提醒不再有效
+            self.reminder_wheel.cancel(task['id'])
+        self.sync_evaluator([task])
+        self.upcoming_model.update_task(task, self.clock.now())
+        self.update_tray_tooltip()
+
+    def update_upcoming(self, tasks, removed_ids):
+        """ 只把变化的任务逐个移进或移出即将提醒视图 """
+        now = self.clock.now()
+        for task_id in removed_ids:
+            self.upcoming_model.remove_task(task_id)
+        for task in tasks:
+            self.upcoming_model.update_task(task, now)
+        self.update_tray_tooltip()
+
+    def first_visible_list(self):
+        visible = self.task_lists.visible_lists()
+        if visible:
+            return self.task_lists.shards[visible[0]]
+        # 所有清单都被停用或收起时，仍然展开默认清单供界面使用
+        self.task_lists.set_list_state(self.task_lists.lists[0]['name'], True, False)
+        return self.task_lists.shards[self.task_lists.lists[0]['name']]
+
+    def on_list_state_changed(self, loaded, unloaded_ids):
+        """ 清单加载或卸载后同步稍后提醒和即将提醒视图 """
+        for task_id in unloaded_ids:
+            self.reminder_wheel.cancel(task_id)
+        self.sync_evaluator(loaded.tasks if loaded is not None else [], unloaded_ids)
+        if loaded is not None or unloaded_ids:
+            self.update_upcoming(loaded.tasks if loaded is not None else [], unloaded_ids)
+
+    def on_task_added(self, task):
+        self.sync_evaluator([task])
+        self.upcoming_model.update_task(task, self.clock.now())
+        self.update_tray_tooltip()
+
+    def on_task_removed(self, task_id):
+        self.reminder_wheel.cancel(task_id)
+        self.sync_evaluator(removed=[task_id])
+        self.upcoming_model.remove_task(task_id)
+        self.update_tray_tooltip()
+
+    def on_action_finished(self, task_id, result):
+        status = "成功" if result['ok'] else "失败"
+        print(f"任务 {task_id} 动作{status}: 返回码={result['exit_code']} 耗时={result.get('elapsed', 0):.2f}s")
+        task = self.task_lists.get_task(task_id)
+        if task is not None:
+            # 保存最近一次结果，在任务列表的悬停提示中显示
+            task['last_action_result'] = {
+                'ok': result['ok'],
+                'exit_code': result['exit_code'],
+                'finished_at': self.clock.now().isoformat(timespec='seconds'),
+                'output': result['output'][-200:],
+            }
+            self.task_lists.save_changes({task_id: {'last_action_result': task['last_action_result']}})
+            if self.main_window.task_data.get_task(task_id) is task:
+                self.main_window.task_model.refresh_task(task_id)
+        if not result['ok']:
+            message = f"任务 {task_id} 的动作执行失败\n{result['output'][-200:]}"
+            self.tray_icon.showMessage("⚡ 动作失败", message, QSystemTrayIcon.MessageIcon.Warning, 8000)
 
     def on_tray_icon_activated(self, reason):
         if reason == QSystemTrayIcon.ActivationReason.Trigger:
             self.show_main_window()
 
-    def handle_socket_connection(self):
-        # 接受连接并显示主窗口
-        try:
-            client_socket, _ = self.server_socket.accept()
-            client_socket.recv(1024)  # 接收数据（不需要处理）
-            client_socket.close()
+    def start_instance_server(self):
+        """ 开始接收后续实例的命令，已有其他实例在监听时返回 False """
+        self.instance_server = InstanceServer(parent=self)
+        if not self.instance_server.listen():
+            self.instance_server = None
+            return False
+        self.instance_server.command_received.connect(self.handle_instance_command)
+        return True
+
+    def handle_instance_command(self, command):
+        """ 处理第二个实例发来的命令：ACTIVATE、PROFILE [秒数]、PROFILE STOP """
+        parts = command.split()
+        if parts and parts[0] == "PROFILE":
+            if len(parts) > 1 and parts[1] == "STOP":
+                self.stop_profiling()
+            else:
+                self.start_profiling(int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else PROFILE_DEFAULT_SECONDS)
+        else:
             self.show_main_window()
-        except Exception as e:
-            print(f"处理套接字连接错误: {e}")
+
+    def toggle_profiling(self):
+        if profiling.active:
+            self.stop_profiling()
+        else:
+            self.start_profiling(PROFILE_DEFAULT_SECONDS)
+
+    def start_profiling(self, seconds):
+        if profiling.active:
+            return
+        profiling.start()
+        self.profile_timer.start(seconds * 1000)
+        self.profile_action.setText(f"停止性能分析（{seconds} 秒后自动停止）")
+
+    def stop_profiling(self):
+        self.profile_timer.stop()
+        self.profile_action.setText("开始性能分析")
+        paths = profiling.stop()
+        if paths:
+            self.tray_icon.showMessage("性能分析完成", f"结果已保存到:\n{os.path.dirname(paths[0])}",
+                                       QSystemTrayIcon.MessageIcon.Information, 8000)
 
     def quit_application(self):
         print("退出应用程序...")
         self.timer.stop()
+        self.reminder_timer.stop()
+        self.watchdog.stop()
+        if self.feed_sync is not None:
+            self.feed_sync.stop()
+        if profiling.active:
+            self.stop_profiling()
+        stats = self.watchdog.stats()
+        print(f"事件循环延迟: 平均 {stats['avg_latency_ms']:.1f}ms，最大 {stats['max_latency_ms']:.1f}ms，卡顿 {stats['stalls']} 次")
         self.tray_icon.hide()
-        if hasattr(self, 'socket_notifier'):
-            self.socket_notifier.setEnabled(False)
-        if hasattr(self, 'server_socket'):
-            self.server_socket.close()
+        self.action_runner.shutdown()
+        self.platform.shutdown()
+        if self.evaluator is not None:
+            self.evaluator.close()
+        self.task_lists.close()
+        if self.instance_server is not None:
+            self.instance_server.close()
         self.quit()
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="定期提醒工具")
+    parser.add_argument("--replay", nargs=2, metavar=("START", "END"),
+                        help="用模拟时钟回放 START 到 END（YYYY-MM-DD[THH:MM]）之间的到期判断后退出；"
+                             "只记录每个时刻触发的任务，不模拟稍后提醒、频率限制/汇总、确认期限和历史记录")
+    parser.add_argument("--replay-log", metavar="PATH", help="回放时把每次触发写入该日志文件")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="回放和压力测试使用的求值进程数，0 表示在当前进程内求值")
+    parser.add_argument("--generate", metavar="PRESET_OR_SPEC",
+                        help=f"生成合成任务文件，可用预设 {', '.join(WORKLOAD_PRESETS)} 或分布描述 json 文件")
+    parser.add_argument("--output", metavar="PATH", help="生成的任务文件路径")
+    parser.add_argument("--count", type=int, help="覆盖分布描述中的任务数量")
+    parser.add_argument("--seed", type=int, help="随机种子，默认使用分布描述中的 seed，都没有时为 0")
+    parser.add_argument("--format", choices=["split", "inline"], default="split",
+                        help="split: 预览 + 正文存储；inline: 正文内联在 json 中")
+    parser.add_argument("--load-test", metavar="DATA_FILE", help="在任务文件的临时副本上模拟调度，输出性能统计，不修改该文件")
+    parser.add_argument("--bench-due", metavar="DATA_FILE",
+                        help="对比逐个比较和列式（NumPy）到期判断的耗时，不写回任务文件")
+    parser.add_argument("--start", help="模拟开始时间（YYYY-MM-DD[THH:MM]），默认今天零点")
+    parser.add_argument("--days", type=float, default=1, help="模拟的天数")
+    parser.add_argument("--profile", nargs="?", const=str(PROFILE_DEFAULT_SECONDS), metavar="SECONDS|stop",
+                        help="让正在运行的实例开始采集性能数据（或 stop 立即结束）")
+    # 其余参数留给 Qt 处理
+    args, _ = parser.parse_known_args(argv[1:])
+    return args
+
+def run_replay(args):
+    start, end = (datetime.datetime.fromisoformat(value) for value in args.replay)
+    task_lists = TaskListManager()
+    # 回放覆盖所有启用的清单，包括收起的
+    for entry in task_lists.lists:
+        if entry.get('enabled', True):
+            task_lists.load_list(entry['name'])
+    tasks = list(task_lists.iter_tasks())
+    stats = replay_schedule(tasks, start, end, args.replay_log, workers=args.workers)
+    print(f"回放 {start} ~ {end}: {len(tasks)} 个任务, {stats['ticks']} 个时刻, "
+          f"{stats['firings']} 次触发, 耗时 {stats['elapsed']:.3f}s, "
+          f"{stats['ticks_per_second']:.0f} 时刻/秒, {stats['firings_per_second']:.0f} 触发/秒")
+    task_lists.close()
+    return 0
+
+def run_generate(args):
+    if args.generate in WORKLOAD_PRESETS:
+        spec = dict(WORKLOAD_PRESETS[args.generate])
+    else:
+        with open(args.generate, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+    if args.count is not None:
+        spec['count'] = args.count
+    output = args.output or f"{args.generate}_tasks.json"
+    started = time.perf_counter()
+    workload = generate_workload(spec, args.seed)
+    write_workload(workload, output, args.format)
+    print(f"已生成 {len(workload)} 个任务到 {output}，耗时 {time.perf_counter() - started:.2f}s")
+    return 0
+
+def run_load_test_cli(args):
+    if args.start:
+        start = datetime.datetime.fromisoformat(args.start)
+    else:
+        start = datetime.datetime.combine(datetime.date.today(), datetime.time.min)
+    stats = run_load_test(args.load_test, start, args.days, workers=args.workers)
+    print(f"任务数: {stats['tasks']}，加载耗时: {stats['load_cost'] * 1000:.1f}ms")
+    print(f"模拟 {stats['ticks']} 个时刻，触发 {stats['firings']} 次")
+    print(f"每个时刻耗时: 平均 {stats['tick_avg'] * 1000:.3f}ms，p99 {stats['tick_p99'] * 1000:.3f}ms，"
+          f"最大 {stats['tick_max'] * 1000:.3f}ms")
+    print(f"保存 {stats['saves']} 次: 平均 {stats['save_avg'] * 1000:.1f}ms，最大 {stats['save_max'] * 1000:.1f}ms")
+    print(f"内存: 任务数据 {stats['loaded_memory'] / 1024 / 1024:.1f}MB，加载峰值 {stats['load_peak_memory'] / 1024 / 1024:.1f}MB"
+          + (f"，进程峰值 {stats['max_rss'] / 1024 / 1024:.1f}MB" if stats['max_rss'] else ""))
+    return 0
+
+def run_due_benchmark_cli(args):
+    if np is None:
+        print("列式到期判断需要安装 NumPy")
+        return 1
+    if args.start:
+        start = datetime.datetime.fromisoformat(args.start)
+    else:
+        start = datetime.datetime.combine(datetime.date.today(), datetime.time.min)
+    stats = run_due_benchmark(args.bench_due, start, args.days)
+    print(f"任务数: {stats['tasks']}，模拟 {stats['ticks']} 个时刻，触发 {stats['firings']} 次，"
+          f"结果{'一致' if stats['identical'] else '不一致'}")
+    print(f"逐个比较: 每个时刻 {stats['loop_tick'] * 1000:.3f}ms")
+    print(f"列式逐分钟: 每个时刻 {stats['column_tick'] * 1000:.3f}ms"
+          f"（{stats['loop_tick'] / stats['column_tick']:.1f} 倍），建立列 {stats['column_build'] * 1000:.1f}ms")
+    print(f"列式按天窗口: 共 {stats['window_cost'] * 1000:.1f}ms，"
+          f"折合每个时刻 {stats['window_cost'] / stats['ticks'] * 1000:.4f}ms")
+    return 0 if stats['identical'] else 1
+
 if __name__ == "__main__":
-    is_running, sock = is_instance_running()
-    if is_running:
+    # 打包后的程序启动求值进程时需要
+    multiprocessing.freeze_support()
+    cli_args = parse_args(sys.argv)
+    if cli_args.replay:
+        sys.exit(run_replay(cli_args))
+    if cli_args.generate:
+        sys.exit(run_generate(cli_args))
+    if cli_args.load_test:
+        sys.exit(run_load_test_cli(cli_args))
+    if cli_args.bench_due:
+        sys.exit(run_due_benchmark_cli(cli_args))
+
+    # 先只创建应用对象，本地套接字需要它
+    app = TrayApplication(sys.argv)
+    if cli_args.profile:
+        value = "STOP" if cli_args.profile.lower() == "stop" else cli_args.profile
+        if not activate_existing_instance(f"PROFILE {value}"):
+            print("没有正在运行的实例")
+            sys.exit(1)
+        sys.exit(0)
+    if not app.start_instance_server():
+        # 已有实例在监听：把激活命令交给它后退出，此时还没有加载任何任务
         activate_existing_instance()
         sys.exit(0)
-    app = TrayApplication(sys.argv, socket=sock)
+    app.setup()
     app.main_window.show()
     exit_code = app.exec()
     sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,55 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "tasks.content.dat")
+
+
+def test_put_get_delete_and_reload(path):
+    store = main.ContentStore(path)
+    store.put(1, "喝水")
+    store.put(2, "x" * 5000)
+    store.put(1, "多喝水")
+    store.delete(2)
+    store.close()
+
+    store = main.ContentStore(path)
+    assert store.get(1) == "多喝水"
+    assert 2 not in store
+    assert store.get(2, default="无") == "无"
+    store.close()
+
+
+def test_compact_keeps_live_bodies(path):
+    store = main.ContentStore(path)
+    for i in range(50):
+        store.put(i, f"正文 {i}" * 20)
+    for i in range(0, 50, 2):
+        store.delete(i)
+    store.compact()
+    assert store.garbage == 0
+    assert [store.get(i) for i in range(1, 50, 2)] == [f"正文 {i}" * 20 for i in range(1, 50, 2)]
+    store.close()
+
+
+@pytest.mark.parametrize("tail", [b"\x07\x00", b"\x09\x00\x00\x00\xff\x00\x00\x00ab"])
+def test_append_after_torn_tail(path, tail):
+    store = main.ContentStore(path)
+    store.put(1, "喝水")
+    store.close()
+    # 写入中途退出留下半条记录（不完整的记录头，或正文不足长度）
+    with open(path, 'ab') as f:
+        f.write(tail)
+
+    store = main.ContentStore(path)
+    assert store.get(1) == "喝水"
+    store.put(2, "新任务")
+    store.close()
+
+    store = main.ContentStore(path)
+    assert store.get(1) == "喝水"
+    assert store.get(2) == "新任务"
+    store.close()
@@ -0,0 +1,119 @@
+import copy
+import datetime
+import random
+
+import pytest
+
+import main
+
+needs_numpy = pytest.mark.skipif(main.np is None, reason="列式到期判断需要 NumPy")
+
+START = datetime.datetime(2026, 10, 19)
+MINUTE = datetime.timedelta(minutes=1)
+SPEC = {
+    "count": 3000,
+    "time": {"distribution": "clustered", "center": "09:00", "spread": 20, "fraction": 0.7},
+    "weekdays": "random",
+    "enabled_ratio": 0.9,
+}
+
+
+@pytest.fixture(scope="module")
+def workload():
+    return main.generate_workload(SPEC, seed=11)
+
+
+def load_copy(tmp_path, workload, name):
+    path = str(tmp_path / f"{name}.json")
+    main.write_workload(workload, path)
+    return main.TaskData(path)
+
+
+def minutes(start, count):
+    return [start + i * MINUTE for i in range(count)]
+
+
+def test_generate_workload_is_deterministic():
+    first = main.generate_workload(dict(SPEC, count=50), seed=3)
+    assert first == main.generate_workload(dict(SPEC, count=50), seed=3)
+    assert first != main.generate_workload(dict(SPEC, count=50), seed=4)
+    # 显式传入的 seed 优先于分布描述中的 seed
+    assert main.generate_workload(dict(SPEC, count=50, seed=3), seed=4) == main.generate_workload(dict(SPEC, count=50), seed=4)
+
+
+@needs_numpy
+def test_columnar_collect_due_matches_dict_path(tmp_path, workload):
+    columnar = load_copy(tmp_path, workload, "columnar")
+    loop = load_copy(tmp_path, workload, "loop")
+    try:
+        assert len(columnar.tasks) >= main.COLUMNAR_MIN_TASKS
+        rng = random.Random(5)
+        firings = 0
+        for current in minutes(START + datetime.timedelta(hours=8), 3 * 60):
+            got = [task['id'] for task in columnar.collect_due(current)]
+            expected = [task['id'] for task in main.collect_due_tasks(loop.tasks, current)]
+            assert got == expected
+            assert columnar.columns is not None and loop.columns is None
+            firings += len(got)
+
+            # 同样的修改同时作用于两份数据
+            if rng.random() < 0.3:
+                task_id = rng.choice(columnar.tasks)['id']
+                fields = rng.choice([
+                    {'time': f"{current.hour:02d}:{current.minute + 1:02d}" if current.minute < 59 else "10:00"},
+                    {'enabled': rng.random() < 0.5},
+                    {'weekdays': sorted(rng.sample(range(7), rng.randint(1, 7)))},
+                ])
+                columnar.update_task(task_id, **fields)
+                loop.update_task(task_id, **fields)
+            if rng.random() < 0.1:
+                when = current + MINUTE
+                columnar.add_task("新任务", [when.weekday()], f"{when:%H:%M}")
+                loop.add_task("新任务", [when.weekday()], f"{when:%H:%M}")
+            if rng.random() < 0.1:
+                task_id = rng.choice(columnar.tasks)['id']
+                columnar.remove_task(task_id)
+                loop.remove_task(task_id)
+        assert firings > 0
+    finally:
+        columnar.close()
+        loop.close()
+
+
+@needs_numpy
+def test_columnar_window_matches_minute_loop(workload):
+    tasks = [task for task, _ in workload]
+    # 部分任务今天已经触发过，还有格式不正确的旧值
+    for task in tasks[::7]:
+        task['last_triggered'] = START.date().isoformat()
+    for task in tasks[3::11]:
+        task['last_triggered'] = "not-a-date"
+    end = START + datetime.timedelta(days=2)
+
+    loop_tasks = copy.deepcopy(tasks)
+    expected = []
+    current = START
+    while current < end:
+        expected.extend((current, task['id']) for task in main.collect_due_tasks(loop_tasks, current))
+        current += MINUTE
+
+    ids = [task['id'] for task in tasks]
+    window = [(when, ids[row]) for when, row in main.TaskColumns(tasks).due_in_window(START, end)]
+    columns = main.TaskColumns(tasks)
+    per_minute = []
+    current = START
+    while current < end:
+        per_minute.extend((current, ids[row]) for row in columns.due_rows(current).tolist())
+        current += MINUTE
+    assert window == expected
+    assert per_minute == expected
+
+
+def test_sharded_replay_matches_single_process(tmp_path):
+    tasks = [task for task, _ in main.generate_workload(dict(SPEC, count=400), seed=2)]
+    end = START + datetime.timedelta(days=1)
+    single, sharded = tmp_path / "single.log", tmp_path / "sharded.log"
+    main.replay_schedule(tasks, START, end, str(single))
+    main.replay_schedule(tasks, START, end, str(sharded), workers=2)
+    assert single.read_text(encoding='utf-8') == sharded.read_text(encoding='utf-8')
+    assert single.read_text(encoding='utf-8')
@@ -0,0 +1,225 @@
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import main
+
+
+FEED = {
+    "tasks": [
+        {"id": "standup", "content": "站会", "weekdays": [0, 1, 2, 3, 4], "time": "9:00"},
+        {"id": "report", "content": "周报", "weekdays": [4], "time": "17:30", "priority": 2},
+    ]
+}
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """ 本地订阅源：带 ETag 和 Last-Modified，校验值匹配时返回 304 """
+    etag = '"v1"'
+    last_modified = "Mon, 19 Oct 2026 08:00:00 GMT"
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.server.failures:
+            self.server.failures -= 1
+            self.send_error(503)
+            return
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(self.server.feed).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', self.etag)
+        self.send_header('Last-Modified', self.last_modified)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def feed_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+    server.feed = FEED
+    server.requests = []
+    server.failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def feed_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/feed.json"
+
+
+def test_parse_feed_normalizes_time():
+    tasks = main.parse_feed(json.dumps(FEED))
+    assert [t['time'] for t in tasks] == ["09:00", "17:30"]
+    assert tasks[1]['priority'] == main.PRIORITY_HIGH
+
+
+def test_parse_feed_skips_invalid_items():
+    raw = json.dumps([
+        {"id": 1, "weekdays": [0], "time": "08:00"},
+        {"id": 1, "weekdays": [1], "time": "08:00"},
+        {"id": 2, "weekdays": [7], "time": "08:00"},
+        {"id": 3, "weekdays": [0], "time": "25:00"},
+        {"id": 4, "weekdays": [0]},
+        {"id": 5, "weekdays": [0], "time": "08:00", "priority": 9},
+        {"id": 6, "weekdays": [0], "time": "08:00", "ack_deadline": 0},
+    ])
+    assert [t['id'] for t in main.parse_feed(raw)] == [1]
+
+
+def test_parse_feed_drops_command_actions():
+    raw = json.dumps([
+        {"id": 1, "weekdays": [0], "time": "08:00", "action": {"type": main.ACTION_COMMAND, "target": "rm -rf /"}},
+        {"id": 2, "weekdays": [0], "time": "08:00", "action": {"type": main.ACTION_WEBHOOK, "target": "http://x"}},
+    ])
+    tasks = main.parse_feed(raw)
+    assert tasks[0]['action'] is None
+    assert tasks[1]['action']['type'] == main.ACTION_WEBHOOK
+
+
+def test_fetch_url_uses_validators(feed_server):
+    fetcher = main.FeedFetcher(feed_url(feed_server))
+    assert len(fetcher.fetch()) == 2
+    # 第二次带上校验值，服务端返回 304，不重新解析
+    assert fetcher.fetch() is None
+    assert feed_server.requests[1]['If-None-Match'] == FeedHandler.etag
+    assert feed_server.requests[1]['If-Modified-Since'] == FeedHandler.last_modified
+
+
+def test_fetch_url_raises_on_server_error(feed_server):
+    feed_server.failures = 1
+    fetcher = main.FeedFetcher(feed_url(feed_server))
+    with pytest.raises(main.urllib.error.HTTPError):
+        fetcher.fetch()
+    assert fetcher.etag is None
+    assert len(fetcher.fetch()) == 2
+
+
+def test_fetch_file_checks_stamp(tmp_path):
+    path = tmp_path / "feed.json"
+    path.write_text(json.dumps(FEED), encoding='utf-8')
+    fetcher = main.FeedFetcher(f"file://{path}")
+    assert len(fetcher.fetch()) == 2
+    assert fetcher.fetch() is None
+    path.write_text(json.dumps(FEED["tasks"][:1]), encoding='utf-8')
+    assert len(fetcher.fetch()) == 1
+
+
+def test_backoff_grows_and_is_capped(monkeypatch):
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: b)
+    sync = main.FeedSync("unused", interval=60, max_backoff=600)
+    assert sync.next_delay() == 60
+    delays = []
+    for failures in range(1, 6):
+        sync.failures = failures
+        delays.append(sync.next_delay())
+    assert delays == [120, 240, 480, 600, 600]
+    monkeypatch.setattr(main.random, 'uniform', lambda a, b: a)
+    assert sync.next_delay() == 300
+
+
+def test_sync_retries_after_failure(feed_server):
+    feed_server.failures = 1
+    sync = main.FeedSync(feed_url(feed_server), interval=0.01, max_backoff=0.05)
+    received, failed = [], []
+    done = threading.Event()
+    sync.sync_failed.connect(failed.append)
+
+    def on_feed(tasks):
+        received.append(tasks)
+        sync.stop()
+        done.set()
+
+    sync.feed_received.connect(on_feed)
+    sync.run()
+    assert done.is_set()
+    assert len(failed) == 1 and len(received[0]) == 2
+    assert sync.failures == 0
+
+
+def test_no_emit_after_stop():
+    sync = main.FeedSync("unused")
+
+    class StoppingFetcher:
+        def fetch(self):
+            sync.stop()
+            return main.parse_feed(json.dumps(FEED))
+
+    sync.fetcher = StoppingFetcher()
+    received = []
+    sync.feed_received.connect(received.append)
+    sync.run()
+    assert received == []
+
+
+def test_merge_feed(tmp_path):
+    data = main.TaskData(str(tmp_path / "tasks.json"))
+    try:
+        result = data.merge_feed(main.parse_feed(json.dumps(FEED)))
+        assert len(result['added']) == 2 and not result['updated'] and not result['removed']
+        standup = next(t for t in data.tasks if t['feed_id'] == "standup")
+        # 周一 9:00 按补零后的时间到期
+        monday = datetime.datetime(2026, 10, 19, 9, 0)
+        assert [t['id'] for t in data.collect_due(monday)] == [standup['id']]
+
+        changed = [dict(FEED["tasks"][0], content="站会改到会议室")]
+        result = data.merge_feed(main.parse_feed(json.dumps(changed)))
+        assert result['updated'] == [standup['id']]
+        assert len(result['removed']) == 1 and not result['added']
+        assert data.get_content(standup) == "站会改到会议室"
+
+        reloaded = main.TaskData(str(tmp_path / "tasks.json"))
+        assert [(t['feed_id'], t['time']) for t in reloaded.tasks] == [("standup", "09:00")]
+        reloaded.close()
+    finally:
+        data.close()
+
+
+def test_merge_feed_in_bulk(tmp_path, monkeypatch):
+    data = main.TaskData(str(tmp_path / "tasks.json"))
+    try:
+        data.add_task("本地任务", [0], "08:00")
+        items = [{"id": i, "content": f"订阅 {i}", "weekdays": [0], "time": "09:00"} for i in range(300)]
+        data.columns = main.TaskColumns(data.tasks)
+        data.get_search_index()
+        saves = []
+        monkeypatch.setattr(data, 'save_data', lambda: saves.append(len(data.tasks)))
+        result = data.merge_feed(main.parse_feed(json.dumps(items)))
+        assert result['added'] == list(range(2, 302))
+        assert saves == [301]
+        assert data.get_content(data.get_task(301)) == "订阅 299"
+        assert data.search_index.search("订阅 299") == {301}
+        monday = datetime.datetime(2026, 10, 19, 9, 0)
+        assert len(data.collect_due(monday)) == 300
+
+        # 只有修改时追加一次修改日志，不整体保存
+        items[5]["content"] = "订阅改名"
+        items[6]["time"] = "10:00"
+        result = data.merge_feed(main.parse_feed(json.dumps(items)))
+        assert result == {'added': [], 'updated': [7, 8], 'removed': []}
+        assert saves == [301]
+        assert data.search_index.search("改名") == {7}
+        monkeypatch.undo()
+        data.save_data()
+    finally:
+        data.close()
+
+    reloaded = main.TaskData(str(tmp_path / "tasks.json"))
+    try:
+        assert reloaded.get_content(reloaded.get_task(7)) == "订阅改名"
+        assert reloaded.get_task(8)['time'] == "10:00"
+    finally:
+        reloaded.close()
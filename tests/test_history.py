@@ -0,0 +1,52 @@
+import datetime
+import os
+
+import pytest
+
+import main
+
+
+START = datetime.datetime(2026, 3, 2, 8, 0)
+
+
+@pytest.fixture
+def clock():
+    return main.SimulatedClock(START)
+
+
+def open_store(directory, clock):
+    return main.HistoryStore(str(directory), clock=clock)
+
+
+def test_query_by_range_and_task(tmp_path, clock):
+    store = open_store(tmp_path, clock)
+    for minute in range(6):
+        store.record_firing(minute % 2 + 1, START, START + datetime.timedelta(minutes=minute))
+    store = open_store(tmp_path, clock)
+    day_end = START + datetime.timedelta(days=1)
+    assert store.count_range(START, day_end) == 6
+    assert [r['task_id'] for r in store.query_range(START, day_end, limit=3)] == [2, 1, 2]
+    assert store.count_task(1) == 3
+    assert [r['actual'].minute for r in store.last_firings(2, n=2)] == [5, 3]
+
+
+def test_append_after_torn_record(tmp_path, clock):
+    store = open_store(tmp_path, clock)
+    store.record_firing(1, START, START)
+    path = os.path.join(str(tmp_path), "20260302" + main.HistoryStore.SUFFIX)
+    # 写入中途退出留下半条记录
+    with open(path, 'ab') as f:
+        f.write(b"\x02\x00\x00")
+
+    store = open_store(tmp_path, clock)
+    assert os.path.getsize(path) == main.HistoryStore.RECORD.size
+    actual = START + datetime.timedelta(minutes=1)
+    handle = store.record_firing(2, START, actual)
+    store.mark(handle, main.HISTORY_ACKNOWLEDGED, actual)
+
+    store = open_store(tmp_path, clock)
+    records = store.query_range(START, START + datetime.timedelta(days=1))
+    assert [(r['task_id'], r['outcome']) for r in records] == [
+        (2, main.HISTORY_ACKNOWLEDGED), (1, main.HISTORY_FIRED)]
+    assert store.last_firings(2)[0]['acknowledged'] == actual
+    assert store.last_firings(1)[0]['acknowledged'] is None
@@ -0,0 +1,119 @@
+import json
+import os
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    return str(tmp_path / "tasks.json")
+
+
+def journal_lines(data_file):
+    path = main.journal_file_for(data_file)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def reopen(data_file):
+    data = main.TaskData(data_file)
+    data.close()
+    return data
+
+
+def test_only_changed_fields_are_journaled(data_file):
+    data = main.TaskData(data_file)
+    task = data.add_task("喝水", [0, 1], "09:00")
+    assert data.update_task(task['id'], time="09:00", enabled=True) == {}
+    assert journal_lines(data_file) == []
+    assert data.update_task(task['id'], enabled=False) == {'enabled': False}
+    assert journal_lines(data_file) == [{'id': task['id'], 'set': {'enabled': False}}]
+    data.close()
+
+
+def test_replay_after_crash(data_file):
+    data = main.TaskData(data_file)
+    task = data.add_task("喝水", [0], "09:00")
+    data.mark_triggered(task, "2026-10-19")
+    data.save_changes({task['id']: {'last_triggered': "2026-10-19"}})
+    data.update_task(task['id'], time="10:30", content="多喝水")
+    # 不调用 save_data 直接重新加载，相当于进程在整体保存前退出
+    data.close()
+
+    reloaded = main.TaskData(data_file)
+    restored = reloaded.get_task(task['id'])
+    assert restored['time'] == "10:30"
+    # 改期后清空了触发日期，新的时间今天仍可触发
+    assert restored['last_triggered'] is None
+    assert restored['preview'] == "多喝水"
+    assert reloaded.get_content(restored) == "多喝水"
+    assert reloaded.journal_entries == 2
+    reloaded.close()
+
+
+def test_truncated_last_line_is_ignored(data_file):
+    data = main.TaskData(data_file)
+    task = data.add_task("喝水", [0], "09:00")
+    data.update_task(task['id'], enabled=False)
+    data.close()
+    with open(main.journal_file_for(data_file), 'a', encoding='utf-8') as f:
+        f.write('{"id": %d, "set": {"time": "1' % task['id'])
+
+    reloaded = main.TaskData(data_file)
+    restored = reloaded.get_task(task['id'])
+    assert restored['enabled'] is False
+    assert restored['time'] == "09:00"
+    # 截掉不完整的行后，重新加载后的第一次修改同样能保存下来
+    reloaded.update_task(task['id'], enabled=True, time="11:00")
+    reloaded.close()
+    assert journal_lines(data_file)[-1] == {'id': task['id'], 'set': {'enabled': True, 'time': "11:00"}}
+    restored = reopen(data_file).get_task(task['id'])
+    assert restored['enabled'] is True
+    assert restored['time'] == "11:00"
+
+
+def test_last_line_without_newline_is_kept(data_file):
+    data = main.TaskData(data_file)
+    task = data.add_task("喝水", [0], "09:00")
+    data.close()
+    with open(main.journal_file_for(data_file), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'id': task['id'], 'set': {'enabled': False}}))
+
+    reloaded = main.TaskData(data_file)
+    reloaded.update_task(task['id'], time="12:00")
+    reloaded.close()
+    restored = reopen(data_file).get_task(task['id'])
+    assert restored['enabled'] is False
+    assert restored['time'] == "12:00"
+
+
+def test_entries_for_removed_tasks_are_skipped(data_file):
+    data = main.TaskData(data_file)
+    task = data.add_task("喝水", [0], "09:00")
+    data.close()
+    with open(main.journal_file_for(data_file), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'id': 999, 'set': {'enabled': False}}) + "\n")
+    reloaded = reopen(data_file)
+    assert reloaded.get_task(999) is None
+    assert reloaded.get_task(task['id'])['enabled'] is True
+
+
+def test_journal_is_compacted(data_file, monkeypatch):
+    monkeypatch.setattr(main, 'JOURNAL_COMPACT_THRESHOLD', 3)
+    data = main.TaskData(data_file)
+    task = data.add_task("喝水", [0], "09:00")
+    for minute in range(1, 4):
+        data.update_task(task['id'], time=f"09:0{minute}")
+    assert len(journal_lines(data_file)) == 3
+    data.update_task(task['id'], time="09:04")
+    # 超过阈值时整体保存并清空日志
+    assert journal_lines(data_file) == []
+    assert data.journal_entries == 0
+    data.close()
+    with open(data_file, encoding='utf-8') as f:
+        assert json.load(f)['tasks'][0]['time'] == "09:04"
+    assert reopen(data_file).get_task(task['id'])['time'] == "09:04"
@@ -0,0 +1,108 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = main.ContentStore(str(tmp_path / "content.dat"))
+    yield store
+    store.close()
+
+
+def build_index(store, bodies):
+    index = main.SearchIndex(store)
+    for task_id, content in bodies.items():
+        store.put(task_id, content)
+        index.add(task_id, content)
+    return index
+
+
+def test_search_tokens_are_unigrams_and_bigrams():
+    assert main.search_tokens("站会 AB") == {"站", "会", "a", "b", "站会", "会 ", " a", "ab"}
+
+
+def test_chinese_substring_without_segmentation(store):
+    index = build_index(store, {1: "每天上午提交周报", 2: "周五下午周会", 3: "备份数据库"})
+    assert index.search("周报") == {1}
+    assert index.search("周") == {1, 2}
+    assert index.search("下午周会") == {2}
+    assert index.search("月报") == set()
+
+
+def test_query_is_normalized(store):
+    index = build_index(store, {1: "Deploy   the  Service", 2: "deploy"})
+    assert index.search("DEPLOY") == {1, 2}
+    assert index.search("deploy the service") == {1}
+    assert index.search("   ") is None
+
+
+def test_bigrams_present_but_not_contiguous_are_rejected(store):
+    # “站会”和“会议”都出现，但没有连续的“站会议”
+    index = build_index(store, {1: "站会 会议", 2: "站会议程"})
+    assert index.search("站会议") == {2}
+
+
+def test_remove_and_update(store):
+    index = build_index(store, {1: "检查邮件", 2: "检查日志"})
+    index.remove(1, "检查邮件")
+    store.put(1, "喝水")
+    index.add(1, "喝水")
+    assert index.search("检查") == {2}
+    assert index.search("喝水") == {1}
+    assert "邮件" not in index.postings
+
+
+def test_task_data_keeps_index_current(tmp_path):
+    data = main.TaskData(str(tmp_path / "tasks.json"))
+    try:
+        first = data.add_task("提交周报", [0], "09:00")
+        data.add_task("检查邮件", [1], "10:00")
+        # 没有搜索时不建立索引
+        assert data.search_index is None
+        assert data.get_search_index().search("周报") == {first['id']}
+
+        data.update_task(first['id'], content="整理文档")
+        third = data.add_task("周报模板", [2], "11:00")
+        assert data.search_index.search("周报") == {third['id']}
+        data.remove_task(third['id'])
+        assert data.search_index.search("周报") == set()
+        assert data.search_index.search("文档") == {first['id']}
+    finally:
+        data.close()
+
+
+def test_index_builds_in_batches(tmp_path):
+    data = main.TaskData(str(tmp_path / "tasks.json"))
+    try:
+        for i in range(25):
+            data.add_task(f"任务 {i} 喝水", [0], "09:00", save=False)
+        assert not data.build_search_index_step(batch=10)
+        assert not data.build_search_index_step(batch=10)
+        assert data.build_search_index_step(batch=10)
+        assert len(data.search_index.search("喝水")) == 25
+    finally:
+        data.close()
+
+
+def test_search_does_not_wait_for_index(tmp_path, monkeypatch):
+    data = main.TaskData(str(tmp_path / "tasks.json"))
+    try:
+        ids = [data.add_task(f"任务 {i} " + ("喝水" if i % 2 else "开会"), [0], "09:00", save=False)['id']
+               for i in range(30)]
+        data.build_search_index_step(batch=10)
+        # 尚未建索引的任务逐条比对正文，结果完整
+        matches, complete = data.search("喝水")
+        assert complete and matches == set(ids[1::2])
+        assert data._index_pending
+
+        # 未建索引的任务太多时只返回已建索引部分的结果
+        monkeypatch.setattr(main, 'SEARCH_SCAN_LIMIT', 5)
+        matches, complete = data.search("喝水")
+        assert not complete and matches < set(ids[1::2])
+
+        while not data.build_search_index_step(batch=10):
+            pass
+        assert data.search("喝水") == (set(ids[1::2]), True)
+    finally:
+        data.close()
@@ -0,0 +1,57 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def lists_file(tmp_path):
+    return str(tmp_path / "task_lists.json")
+
+
+def open_manager(lists_file, tmp_path):
+    return main.TaskListManager(lists_file, str(tmp_path / "tasks.json"))
+
+
+def add(shard, n):
+    return [shard.add_task(f"任务 {i}", [0], "09:00", save=False)['id'] for i in range(n)]
+
+
+def test_ids_unique_across_lists(lists_file, tmp_path):
+    manager = open_manager(lists_file, tmp_path)
+    first = add(manager.shards[main.DEFAULT_LIST_NAME], 3)
+    second = add(manager.create_list("工作"), 3)
+    assert len(set(first + second)) == 6
+    assert first == [1, 2, 3]
+    assert second == [4, 5, 6]
+    manager.close()
+
+
+def test_bulk_add_saves_manifest_per_block(lists_file, tmp_path, monkeypatch):
+    manager = open_manager(lists_file, tmp_path)
+    saves = []
+    monkeypatch.setattr(manager, 'save_manifest', lambda: saves.append(manager.next_id))
+    add(manager.shards[main.DEFAULT_LIST_NAME], 2500)
+    assert len(saves) == 3
+
+
+def test_reopen_continues_ids(lists_file, tmp_path):
+    manager = open_manager(lists_file, tmp_path)
+    shard = manager.shards[main.DEFAULT_LIST_NAME]
+    add(shard, 2)
+    shard.save_data()
+    manager.close()
+    manager = open_manager(lists_file, tmp_path)
+    assert add(manager.shards[main.DEFAULT_LIST_NAME], 1) == [3]
+    manager.close()
+
+
+def test_ids_not_reused_after_crash(lists_file, tmp_path):
+    manager = open_manager(lists_file, tmp_path)
+    shard = manager.shards[main.DEFAULT_LIST_NAME]
+    ids = add(shard, 5)
+    shard.save_data()
+    shard.remove_tasks(ids[2:])
+    # 未调用 close 直接退出，清单目录只记着预留的上限
+    manager = open_manager(lists_file, tmp_path)
+    assert add(manager.shards[main.DEFAULT_LIST_NAME], 1)[0] > ids[-1]
+    manager.close()
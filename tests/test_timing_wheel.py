@@ -0,0 +1,81 @@
+import random
+
+import main
+
+
+def test_fires_at_expiry_tick():
+    wheel = main.TimingWheel(start=0)
+    wheel.add("a", 5, "payload")
+    assert wheel.advance(4) == []
+    assert wheel.advance(5) == [("a", "payload")]
+    assert len(wheel) == 0
+
+
+def test_cascades_from_upper_levels():
+    # 三层各 4 格：第 1 层每格 4 tick，第 2 层每格 16 tick，总跨度 64
+    wheel = main.TimingWheel(level_sizes=(4, 4, 4), start=0)
+    wheel.add("near", 3)
+    wheel.add("mid", 13)
+    wheel.add("far", 50)
+    assert wheel.locations["mid"][0] == 1
+    assert wheel.locations["far"][0] == 2
+    assert wheel.advance(12) == [("near", None)]
+    assert wheel.advance(13) == [("mid", None)]
+    assert wheel.advance(49) == []
+    assert wheel.advance(50) == [("far", None)]
+
+
+def test_entries_beyond_span_are_replaced():
+    wheel = main.TimingWheel(level_sizes=(4, 4, 4), start=0)
+    wheel.add("later", 200)
+    assert wheel.advance(199) == []
+    assert "later" in wheel
+    assert wheel.advance(200) == [("later", None)]
+
+
+def test_add_replaces_and_cancel_returns_payload():
+    wheel = main.TimingWheel(start=0)
+    wheel.add("a", 10, 1)
+    wheel.add("a", 20, 2)
+    assert len(wheel) == 1
+    assert wheel.advance(10) == []
+    assert wheel.cancel("a") == 2
+    assert wheel.cancel("a") is None
+    assert wheel.advance(30) == []
+
+
+def test_past_expiry_fires_on_next_advance():
+    wheel = main.TimingWheel(start=100)
+    wheel.add("late", 50)
+    assert wheel.advance(101) == [("late", None)]
+
+
+def test_tick_seconds():
+    wheel = main.TimingWheel(tick_seconds=60, start=0)
+    wheel.add("a", 125.5)
+    assert wheel.advance(119) == []
+    assert wheel.advance(120) == [("a", None)]
+
+
+def test_matches_naive_schedule():
+    rng = random.Random(7)
+    wheel = main.TimingWheel(level_sizes=(4, 4, 4), start=0)
+    pending = {}
+    now = 0
+    for step in range(3000):
+        for _ in range(rng.randint(0, 3)):
+            key = rng.randrange(200)
+            expire = now + rng.randint(-2, 150)
+            wheel.add(key, expire, step)
+            pending[key] = (expire, step)
+        if pending and rng.random() < 0.2:
+            key = rng.choice(list(pending))
+            assert wheel.cancel(key) == pending.pop(key)[1]
+        now += rng.randint(1, 9)
+        fired = wheel.advance(now)
+        expected = {key: payload for key, (expire, payload) in pending.items() if expire <= now}
+        assert dict(fired) == expected
+        assert len(fired) == len(expected)
+        for key in expected:
+            del pending[key]
+        assert len(wheel) == len(pending)